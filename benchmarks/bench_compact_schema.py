@@ -0,0 +1,46 @@
+"""Bytes por fila del DataFrame de cargas antes y después de CompactSchema.
+
+    python -m benchmarks.bench_compact_schema
+"""
+import numpy as np
+import pandas as pd
+
+import utils.functions as fn
+
+N_ROWS = 500_000
+
+
+def synthetic_loads(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    states = np.array(fn.CompactSchema.STATES)
+    df = pd.DataFrame({
+        "start_date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24 * 60, n_rows), unit="m"),
+        "broker_shipper": np.array([f"BROKER {i}" for i in range(3000)])[rng.integers(0, 3000, n_rows)],
+        "dispatcher_user": np.array([f"dispatcher{i}" for i in range(200)])[rng.integers(0, 200, n_rows)],
+        "equip": np.array(fn.CompactSchema.EQUIPS)[rng.integers(0, 3, n_rows)],
+        "origin": states[rng.integers(0, len(states), n_rows)],
+        "destination": states[rng.integers(0, len(states), n_rows)],
+        "distance": rng.integers(50, 3000, n_rows).astype(float),
+        "income": rng.integers(300, 9000, n_rows).astype(float),
+    })
+    df = fn.FinanceCalculator.calculate_finance(df)
+    df = fn.DaysCalculator.calculate_days(df)
+    for var in ["income", "profit", "cost"]:
+        df[f"{var}_dist"] = (df[var] / df["distance"]).round(2)
+        df[f"{var}_day"] = (df[var] / df["days"]).round(0)
+    return df
+
+
+def main():
+    df = synthetic_loads(N_ROWS)
+    before = fn.CompactSchema.bytes_per_row(df)
+    # apply convierte en su lugar
+    after = fn.CompactSchema.bytes_per_row(fn.CompactSchema.apply(df))
+    print(f"rows: {N_ROWS:,}")
+    print(f"before: {before:8,.1f} bytes/row  ({before * N_ROWS / 2**20:,.1f} MiB)")
+    print(f"after:  {after:8,.1f} bytes/row  ({after * N_ROWS / 2**20:,.1f} MiB)")
+    print(f"ratio:  {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
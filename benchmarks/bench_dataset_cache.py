@@ -0,0 +1,98 @@
+"""Carga en frío y en caliente de los dos datasets a través de los cargadores cacheados reales.
+
+Sustituye solo la red (fetch_company_loads, fetch_indicators y la API key) y el
+almacén local (un directorio temporal): load_company_history y load_indicators pasan
+por cache_manager.cached, freeze y RangeCache como en la app. Mide la carga en frío,
+el acierto exacto y un subrango servido como corte, y comprueba que el tamaño que
+registra el presupuesto coincide con memory_usage(deep=True) de una copia escribible.
+
+    python -m benchmarks.bench_dataset_cache
+"""
+import datetime as dt
+import logging
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import utils.functions as fn
+from utils.cache_manager import cache_manager, sizeof
+from utils.history_store import HistoryStore
+from utils.snapshot import is_frozen
+
+DATE_RANGE = (dt.date(2024, 1, 1), dt.date(2024, 3, 31))
+SUB_RANGE = (dt.date(2024, 2, 1), dt.date(2024, 2, 29))
+LOADS_PER_DAY = 300
+
+
+def synthetic_company_loads(equip, start_day, end_day, seed=0):
+    """Respuesta de company_history para un día de recogida y un tipo de camión."""
+    rng = np.random.default_rng([seed, start_day.toordinal(), fn.TRUCK_TYPES.index(equip)])
+    n_rows = LOADS_PER_DAY // len(fn.TRUCK_TYPES)
+    states = np.array(fn.CompactSchema.STATES)
+    posted = pd.Timestamp(start_day) - pd.to_timedelta(rng.integers(0, 7 * 24 * 60, n_rows), unit="m")
+    df = pd.DataFrame({
+        "posted": posted.strftime("%Y-%m-%dT%H:%M:%S"),
+        "brokerShipper": np.array([f"BROKER {i}" for i in range(300)])[rng.integers(0, 300, n_rows)],
+        "dispatcherUser": np.array([f"dispatcher{i}" for i in range(40)])[rng.integers(0, 40, n_rows)],
+        "equip": equip,
+        "stateOrigin": states[rng.integers(0, len(states), n_rows)],
+        "stateDestination": states[rng.integers(0, len(states), n_rows)],
+        "distance": rng.integers(50, 3000, n_rows).astype(float),
+        "rateTotal": rng.integers(300, 9000, n_rows).astype(float),
+    })
+    return df[list(fn.HISTORY_COLUMNS)]
+
+
+def synthetic_indicators(apikey, start_day, end_day, seed=1):
+    """Respuesta de get-indicators ya normalizada: carriles estado -> USA y USA -> estado por día."""
+    rng = np.random.default_rng([seed, start_day.toordinal()])
+    days = pd.date_range(start_day, end_day)
+    frames = []
+    for equip in fn.CompactSchema.EQUIPS:
+        for state in fn.CompactSchema.STATES:
+            for origin, destination in [("USA", state), (state, "USA")]:
+                frames.append(pd.DataFrame({"start_date": days, "equip": equip, "origin": origin, "destination": destination,
+                                            "income": rng.uniform(1e4, 5e4, len(days)), "cost": rng.uniform(1e4, 4e4, len(days)),
+                                            "days": rng.uniform(5, 40, len(days)), "distance": rng.uniform(5e3, 2e4, len(days))}))
+    df = pd.concat(frames, ignore_index=True)
+    df["profit"] = df["income"] - df["cost"]
+    df = fn.get_resolution(df, "origin").rename(columns={"resolution": "res_origin"})
+    return fn.get_resolution(df, "destination").rename(columns={"resolution": "res_destination"})
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    return time.perf_counter() - start, value
+
+
+def main():
+    # El spinner de los cargadores avisa en cada carga que no hay sesión de Streamlit
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+    fn.fetch_company_loads = synthetic_company_loads
+    fn.fetch_indicators = synthetic_indicators
+    fn.get_apikey = lambda: "bench"
+    fn.history_store = HistoryStore(tempfile.mkdtemp(prefix="bench_history_"))
+    cache_manager.clear()
+
+    print(f"{'dataset':<16}{'rows':>9}{'cold':>9}{'hit':>10}{'slice':>10}{'MiB':>8}  {'frozen':<7}{'size check':<10}")
+    for name, get in [("company_history", fn.get_company_history), ("indicators", fn.get_indicators)]:
+        t_cold, df = timed(get, DATE_RANGE)
+        t_hit, _ = timed(get, DATE_RANGE)
+        t_slice, _ = timed(get, SUB_RANGE)
+        size = sizeof(df)
+        expected = int(pd.DataFrame(df, copy=True).memory_usage(index=True, deep=True).sum())
+        print(f"{name:<16}{len(df):>9,}{t_cold:>8.2f}s{t_hit * 1000:>8.2f}ms{t_slice * 1000:>8.2f}ms{size / 2**20:>8.1f}  "
+              f"{str(is_frozen(df)):<7}{'ok' if size == expected else f'{size} != {expected}':<10}")
+
+    stats = cache_manager.get_stats()
+    print(f"\ncache: {stats['entries']} entries, {stats['bytes'] / 2**20:,.1f} of {stats['budget_bytes'] / 2**20:,.0f} MiB")
+    for name, counters in stats["functions"].items():
+        print(f"  {name:<40}hits {counters['hits']:>3}  misses {counters['misses']:>3}  coalesced {counters['coalesced']:>3}  "
+              f"evictions {counters['evictions']:>3}")
+
+
+if __name__ == "__main__":
+    main()
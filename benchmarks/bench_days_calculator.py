@@ -0,0 +1,50 @@
+"""DaysCalculator.calculate_days vectorizado contra el apply fila a fila anterior.
+
+    python -m benchmarks.bench_days_calculator
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.functions import DaysCalculator
+
+N_ROWS = (50_000, 500_000)
+REPEAT = 3
+
+
+def calculate_days_apply(df):
+    """Implementación anterior: redondeo con apply por fila."""
+    base_days = ((df['distance']) / 50) / 11
+    df['days'] = base_days
+    df['days'] = np.where(df['days'] < 1, 1, df['days'])
+    df['days'] = df['days'].apply(DaysCalculator.round_days)
+    return df
+
+
+def best_of(func, df):
+    times = []
+    for _ in range(REPEAT):
+        frame = df.copy()
+        start = time.perf_counter()
+        result = func(frame)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for n_rows in N_ROWS:
+        df = pd.DataFrame({
+            "equip": np.array(["REEFER", "VAN", "FLATBED"])[rng.integers(0, 3, n_rows)],
+            "distance": rng.integers(1, 3000, n_rows).astype(float),
+        })
+        t_apply, expected = best_of(calculate_days_apply, df)
+        t_vector, result = best_of(DaysCalculator.calculate_days, df)
+
+        assert np.array_equal(expected["days"].to_numpy(dtype=float), result["days"].to_numpy())
+        print(f"{n_rows:>9,} rows  apply {t_apply * 1000:8.1f} ms  vectorized {t_vector * 1000:7.1f} ms  ({t_apply / t_vector:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
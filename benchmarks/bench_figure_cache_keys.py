@@ -0,0 +1,93 @@
+"""Costo de una visita con caché de los mapas de Financial Performance: frame hasheado contra clave explícita.
+
+Con el DataFrame como argumento de st.cache_resource, Streamlit lo hashea en cada
+llamada para buscar el mapa; con _df y key solo hashea la clave (versión del dataset y
+filtros de la página) y los parámetros del mapa. Se mide la primera construcción y el
+acierto de caché de los tres mapas de la página (cliente, ratio y diferencia) sobre el
+frame semanal y el diario de un equipo.
+
+    python -m benchmarks.bench_figure_cache_keys
+"""
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import utils.functions as fn
+import utils.graphs as grp
+
+YEARS = 3
+REPEAT = 5
+FREQS = {"weekly": "W", "daily": "D"}
+
+
+@st.cache_resource(show_spinner=False)
+def hashed_map_states(df, variable, state_id, anm_col, namevar, round_value, tooltip, color_scale="ylgn"):
+    return grp.get_map_states.__wrapped__(df, None, variable, state_id, anm_col, namevar, round_value, tooltip, color_scale=color_scale)
+
+
+@st.cache_resource(show_spinner=False)
+def hashed_map_states_h(df, variable, state_id, anm_col, namevar, round_value, tooltip, var_plot):
+    return grp.get_map_states_h.__wrapped__(df, None, variable, state_id, anm_col, namevar, round_value, tooltip, var_plot)
+
+
+def synthetic_filtered(freq, seed=0):
+    """Frame como el de process_data + filter_by_equip: un periodo × estado por fila."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2022-01-03", periods=365 * YEARS, freq="D")[::7 if freq == "W" else 1]
+    states = fn.CompactSchema.STATES
+    n_rows = len(dates) * len(states)
+    income_c, income_i = rng.random(n_rows) * 5000, rng.random(n_rows) * 5000
+    distance_c = rng.random(n_rows) * 2000 + 100
+    return pd.DataFrame({
+        "start_date": np.repeat(dates.date, len(states)),
+        "destination": np.tile(states, len(dates)),
+        "equip": "VAN",
+        "income_c": income_c.astype("float32"),
+        "distance_c": distance_c.astype("float32"),
+        "income_i": income_i.astype("float32"),
+        "income_dist_c": (income_c / distance_c).round(2),
+        "income_dist_i": (income_i / distance_c).round(2),
+        "ratio": (income_c / income_i).round(2),
+        "diff": (income_c - income_i).round(2),
+    })
+
+
+def page_maps(df, key=None):
+    tooltip_client = [("income_dist_c", "<b>Income Per Mile</b>", 2), ("distance_c", "Distance", 0)]
+    tooltip_ratio = [("ratio", "<b>Ratio</b>", 2), ("income_dist_c", "Client", 2), ("income_dist_i", "Ind", 2)]
+    tooltip_diff = [("diff", "<b>Difference</b>", 2), ("income_dist_c", "Client", 2), ("income_dist_i", "Ind", 2)]
+    if key is None:
+        return (hashed_map_states(df, "income_dist_c", "destination", "start_date", "Income Per Mile", 2, tooltip_client),
+                hashed_map_states_h(df, "ratio", "destination", "start_date", "Ratio", 2, tooltip_ratio, "income_dist_c"),
+                hashed_map_states_h(df, "diff", "destination", "start_date", "Difference", 2, tooltip_diff, "income_dist_c"))
+    return (grp.get_map_states(df, key, "income_dist_c", "destination", "start_date", "Income Per Mile", 2, tooltip_client),
+            grp.get_map_states_h(df, key, "ratio", "destination", "start_date", "Ratio", 2, tooltip_ratio, "income_dist_c"),
+            grp.get_map_states_h(df, key, "diff", "destination", "start_date", "Difference", 2, tooltip_diff, "income_dist_c"))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    print(f"{'frame':<8}{'rows':>9}{'build':>10}{'hit (hash df)':>16}{'hit (key)':>12}{'saved/render':>15}")
+    for name, freq in FREQS.items():
+        df = synthetic_filtered(freq)
+        key = (1, "Inbound", name, "Income", "Per Mile", "VAN")
+
+        t_build = timed(page_maps, df, key)
+        timed(page_maps, df)
+        t_hashed = min(timed(page_maps, df) for _ in range(REPEAT))
+        t_key = min(timed(page_maps, df, key) for _ in range(REPEAT))
+        print(f"{name:<8}{len(df):>9,}{t_build:>9.2f}s{t_hashed * 1000:>14.1f}ms{t_key * 1000:>10.1f}ms"
+              f"{(t_hashed - t_key) * 1000:>13.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
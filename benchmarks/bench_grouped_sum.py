@@ -0,0 +1,66 @@
+"""grouped_sum (bincount sobre la clave compuesta) contra groupby().sum() de pandas.
+
+Usa las mismas claves que aggregate_data a frecuencia semanal: año/semana ISO,
+estado y equipo categóricos, y las medidas en float32.
+
+    python -m benchmarks.bench_grouped_sum
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.data_service import MEASURES
+from utils.functions import CompactSchema
+from utils.grouped_sum import grouped_sum
+
+N_ROWS = (100_000, 1_000_000, 10_000_000)
+KEYS = ['iso_year', 'iso_week', 'destination', 'equip']
+REPEAT = 3
+
+
+def pandas_sum(df):
+    return df.groupby(KEYS, observed=True)[MEASURES].sum().reset_index()
+
+
+def numpy_sum(df):
+    return grouped_sum(df, KEYS, MEASURES)
+
+
+def best_of(func, df):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func(df)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def build_frame(rng, n_rows):
+    states = CompactSchema.STATES
+    df = pd.DataFrame({
+        'iso_year': rng.integers(2022, 2025, n_rows).astype('int16'),
+        'iso_week': rng.integers(1, 53, n_rows).astype('int8'),
+        'destination': pd.Categorical.from_codes(rng.integers(0, len(states), n_rows), categories=states),
+        'equip': pd.Categorical.from_codes(rng.integers(0, 3, n_rows), categories=CompactSchema.EQUIPS),
+    })
+    for measure in MEASURES:
+        df[measure] = rng.random(n_rows, dtype='float32') * 1000
+    return df
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for n_rows in N_ROWS:
+        df = build_frame(rng, n_rows)
+        t_pandas, expected = best_of(pandas_sum, df)
+        t_numpy, result = best_of(numpy_sum, df)
+
+        pd.testing.assert_frame_equal(expected, result, check_exact=False, rtol=1e-3)
+        print(f"{n_rows:>11,} rows  {len(result):>6,} groups  pandas {t_pandas * 1000:8.1f} ms  "
+              f"numpy {t_numpy * 1000:8.1f} ms  ({t_pandas / t_numpy:5.1f}x)")
+        del df, expected, result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Compara una sesión nueva por petición contra el cliente compartido con pool.
+
+Levanta un servidor HTTP local que responde como la API de company_history y mide
+la latencia media de N POST secuenciales y concurrentes. Cada conexión nueva paga
+CONNECT_DELAY para simular el handshake que el pool evita.
+
+    python -m benchmarks.bench_http_client
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import utils.http_client as http_client
+
+N_REQUESTS = 200
+# Costo simulado de abrir una conexión (RTT + handshake TLS contra API Gateway)
+CONNECT_DELAY = 0.02
+PAYLOAD = json.dumps({"loads": [{"posted": "2024-07-01T10:00:00", "equip": "VAN", "distance": 500, "rateTotal": 1500}] * 50}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        time.sleep(CONNECT_DELAY)
+        super().setup()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+
+def fresh_session_post(url):
+    session = requests.Session()
+    return session.post(url, json={"truck_types": ["DRY"]})
+
+
+def pooled_post(url):
+    return http_client.post(url, json={"truck_types": ["DRY"]})
+
+
+def run(label, fn, url, workers):
+    start = time.perf_counter()
+    if workers == 1:
+        for _ in range(N_REQUESTS):
+            fn(url)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda _: fn(url), range(N_REQUESTS)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} workers={workers:<2} {elapsed / N_REQUESTS * 1000:8.2f} ms/req")
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/dev/company_history"
+
+    for workers in (1, 3):
+        run("requests.Session() por POST", fresh_session_post, url, workers)
+        run("http_client (pool)", pooled_post, url, workers)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Capas sobre los mapas animados: trazas por fila contra trazas por cuadro.
+
+Reproduce los bucles anteriores (iterrows con go.Scattergeo por fila, fuera de la
+animación) y los compara con las capas por cuadro de get_map_states_h (marcadores y texto
+del mapa de diferencia de Profit) y de get_map_dis_bubble (burbuja de mejor equipo frente
+a la industria). Mide tiempo de construcción, número de trazas y tamaño del JSON para
+vistas semanales de un trimestre, un semestre y un año.
+
+    python -m benchmarks.bench_map_overlays
+"""
+import json
+import logging
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+import utils.graphs as grp
+from benchmarks.bench_figure_cache_keys import synthetic_filtered
+
+WEEKS = (13, 26, 52)
+TOOLTIP = [("diff", "<b>Difference</b>", 0), ("profit_c", "Profit Client", 0), ("profit_i", "Profit Ind", 0)]
+
+
+def loop_overlays(df, variable, state_id, anm_col, namevar, round_value, tooltip, var_plot):
+    df = df.copy()
+    df[anm_col] = df[anm_col].astype(str)
+    value = max(abs(df[variable].min()), abs(df[variable].max()))
+    fig = grp.ChoroplethMap(df, state_id, variable, namevar, round_value, -value, value, "rdylgn").generate_map(anm_col, tooltip)
+
+    with open("files/state_coords.json", "r") as json_file:
+        state_coords = json.load(json_file)
+    for _, row in df.iterrows():
+        state = row[state_id]
+        if state in state_coords:
+            fig.add_trace(go.Scattergeo(lon=[state_coords[state][0]], lat=[state_coords[state][1]],
+                                        marker=dict(size=40, symbol="square", opacity=1, color='white'), mode="markers", showlegend=False))
+            fig.add_trace(go.Scattergeo(lon=[state_coords[state][0]], lat=[state_coords[state][1]], text=f"{row[var_plot]:.{round_value}f}",
+                                        mode="text", textfont=dict(color="blue" if row[var_plot] > 0 else "red", size=15), showlegend=False))
+    return fig
+
+
+def frame_overlays(df, *args):
+    return grp.get_map_states_h.__wrapped__(df, None, *args)
+
+
+def loop_bubbles(df_pivot_m, state_id, color_dict, color_col, color_bubble):
+    fig = grp.px.choropleth(df_pivot_m, locations=state_id, locationmode="USA-states", color=color_col, animation_frame='start_date',
+                            hover_data={state_id: True, 'REEFER_r': True, 'VAN_r': True, 'FLATBED_r': True}, scope="usa", color_discrete_map=color_dict)
+    with open("files/state_coords.json", "r") as json_file:
+        state_coords = json.load(json_file)
+    for _, row in df_pivot_m.iterrows():
+        state = row[state_id]
+        if state in state_coords:
+            fig.add_trace(go.Scattergeo(lon=[state_coords[state][0]], lat=[state_coords[state][1]], marker=dict(size=20, symbol="circle", opacity=1, color=row[color_bubble]), mode="markers", showlegend=False))
+    return fig
+
+
+def frame_bubbles(df_pivot_m, *args):
+    return grp.get_map_dis_bubble.__wrapped__(df_pivot_m, None, *args)
+
+
+def synthetic_pivot(df, seed=0):
+    """Frame como el de prepare_pivot_data: mejor equipo, etiquetas y color de la burbuja por estado y periodo."""
+    rng = np.random.default_rng(seed)
+    ratios = rng.random((len(df), 3)) * 2
+    pivot = df[["start_date", "destination"]].copy()
+    pivot["best_equip_r"] = np.array(["REEFER", "VAN", "FLATBED"])[ratios.argmax(axis=1)]
+    for i, equip in enumerate(["REEFER", "VAN", "FLATBED"]):
+        pivot[f"{equip}_r"] = [f"{ratio:.2f}" for ratio in ratios[:, i]]
+    pivot["equip_color_r"] = np.where(ratios.max(axis=1) > 1, "green", "red").astype(object)
+    return pivot
+
+
+def measure(build, df, *args):
+    start = time.perf_counter()
+    fig = build(df, *args)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(fig.data) + sum(len(frame.data) for frame in fig.frames), len(fig.to_json())
+
+
+def compare(title, loop_build, frame_build, df_all, args):
+    print(f"\n{title}")
+    print(f"{'weeks':>5}{'rows':>7}  {'loop build':>10}{'traces':>8}{'json':>10}  {'frame build':>11}{'traces':>8}{'json':>10}")
+    for weeks in WEEKS:
+        df = df_all.head(weeks * len(grp.StateCoords.INDEX))
+        t_loop, n_loop, size_loop = measure(loop_build, df, *args)
+        t_frame, n_frame, size_frame = measure(frame_build, df, *args)
+        print(f"{weeks:>5}{len(df):>7}  {t_loop:>9.2f}s{n_loop:>8}{size_loop / 2**20:>8.2f}MB  "
+              f"{t_frame:>10.2f}s{n_frame:>8}{size_frame / 2**20:>8.2f}MB")
+
+
+def main():
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    df_all = synthetic_filtered("W").rename(columns={"income_c": "profit_c", "income_i": "profit_i"})
+    compare("get_map_states_h (Profit difference)", loop_overlays, frame_overlays, df_all,
+            ("diff", "destination", "start_date", "Difference", 0, TOOLTIP, "profit_c"))
+    color_dict = {"REEFER": "#1f77b4", "VAN": "#ff7f0e", "FLATBED": "#2ca02c"}
+    compare("get_map_dis_bubble (best equip vs industry)", loop_bubbles, frame_bubbles, synthetic_pivot(df_all),
+            ("destination", color_dict, "best_equip_r", "equip_color_r"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Filtros de las páginas de secciones: DataFrame.query contra máscara booleana y PartitionIndex.
+
+Mide el filtro por equipo (Brokerage/Dispatchers), por estado (Equips) y por estado y
+equipo (Hauling Performance) sobre el dataset compacto, y el filtro por broker con un
+nombre con comillas, que rompe la expresión de query.
+
+    python -m benchmarks.bench_partition_index
+"""
+import time
+
+import pandas as pd
+
+import utils.functions as fn
+from benchmarks.bench_compact_schema import synthetic_loads
+from utils.partition_index import PartitionIndex
+
+N_ROWS = 1_000_000
+REPEAT = 5
+QUOTED_BROKER = "O'NEIL LOGISTICS"
+
+FILTERS = [
+    ("equip", {"equip": "VAN"}),
+    ("state", {"destination": "TX"}),
+    ("state + equip", {"destination": "TX", "equip": "VAN"}),
+    ("broker", {"broker_shipper": "BROKER 7"}),
+]
+
+
+def query_filter(df, criteria):
+    return df.query(" & ".join(f"{col} == '{value}'" for col, value in criteria.items()))
+
+
+def mask_filter(df, criteria):
+    mask = True
+    for col, value in criteria.items():
+        mask = mask & (df[col] == value)
+    return df[mask]
+
+
+def best_of(func, *args):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    df = synthetic_loads(N_ROWS)
+    df.loc[df.index[::1000], "broker_shipper"] = QUOTED_BROKER
+    df = fn.CompactSchema.apply(df)
+
+    index = PartitionIndex(df)
+    start = time.perf_counter()
+    for col in ["equip", "destination", "broker_shipper"]:
+        index.positions(**{col: None})
+    print(f"rows: {N_ROWS:,}  partition build (3 columns): {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    print(f"{'filter':<14}{'query':>10}{'mask':>10}{'index':>10}{'speedup':>10}")
+    for name, criteria in FILTERS:
+        t_query, expected = best_of(query_filter, df, criteria)
+        t_mask, masked = best_of(mask_filter, df, criteria)
+        t_index, selected = best_of(lambda: index.select(**criteria))
+
+        pd.testing.assert_frame_equal(expected, masked)
+        pd.testing.assert_frame_equal(expected, selected)
+        print(f"{name:<14}{t_query * 1000:8.1f}ms{t_mask * 1000:8.1f}ms{t_index * 1000:8.1f}ms{t_query / t_index:9.1f}x")
+
+    criteria = {"broker_shipper": QUOTED_BROKER}
+    try:
+        query_filter(df, criteria)
+        query_result = "ok"
+    except Exception as error:
+        query_result = type(error).__name__
+    print(f"\nbroker {QUOTED_BROKER!r}: query -> {query_result}, index -> {len(index.select(**criteria)):,} rows")
+
+
+if __name__ == "__main__":
+    main()
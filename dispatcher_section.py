@@ -11,7 +11,6 @@ def app():
     
     # Obtener datos de la sesión
     date_range, freq = st.session_state['date_range'], st.session_state['freq']
-    f = ui_service.get_frequency(freq)
     
     # UI para seleccionar filtros
     type_trip, variable, agg_type, col_value_g, col_agg_type, col_value = ui_service.render_filters(plus_aggt=['Total'])
@@ -20,36 +19,32 @@ def app():
     
     # Cargar datos
     df, df_ind = data_service.load_data(date_range)
+    cube = data_service.get_cube(df, df_ind)
     df, df_ind_filt, col_state = data_service.filter_data(df, df_ind, type_trip)
     
     # Filtrar datos por equipo seleccionado
-    df_eq = data_service.filter_by_equip(df, equip)
-    df_ind_eq = data_service.filter_by_equip(df_ind_filt, equip)
+    df_eq = cube.rows(equip=equip)
     
-    cat_bx, cat_full = data_service.get_top_categories(df_eq, col_value, 'dispatcher_user')
+    cat_bx, cat_full = data_service.get_top_categories(df_eq, col_value, 'dispatcher_user', cube=cube, equip=equip)
     
     st.header(f"Total Distpachers: {len(cat_full)}")
     
     if len(cat_bx) > 0:
         ui_service.render_boxplot_cat(df_eq, 'dispatcher_user', cat_bx, col_value, variable, agg_type, 'Dispatcher')
 
-    # Agrupar datos clientes e industria
-    df_agg, df_ind_agg = data_service.aggregate_data(df_eq, df_ind_eq, col_state, f, freq)
+    # Comparación de todos los dispatchers contra empresa e industria (en caché por dataset)
+    comparison = cube.category_comparison(col_state, freq, equip, 'dispatcher_user', col_value, col_value_g, col_agg_type)
     
-    # Agrupar datos clientes por broker
-    df_agg_cat = data_service.aggregate_data_raw(df_eq, col_state, f, freq, raw_list=['dispatcher_user'])
-
-    # UI para brokers
+    # UI para dispatchers
     cat_select = st.selectbox("**Select Distpacher**", cat_full, index=0)
     
-    # Filtrar datos por broker seleccionado
-    df_agg_cat_filt = data_service.filter_by_cat(df_agg_cat, 'dispatcher_user', cat_select)
-
-    df_merged = data_service.merge_raw_agg(df_agg, df_agg_cat_filt, df_ind_agg, col_state, freq, col_value, col_value_g, col_agg_type)
+    # Filtrar la comparación por dispatcher seleccionado
+    df_merged = comparison.get(cat_select)
 
     round_value = 2 if agg_type == 'Per Mile' else 0
     
-    overview_map, ratio_map_bc, ratio_map_bi, diff_map_bc, diff_map_bi = plot_service.generate_state_sp_maps(df_merged, col_value, col_agg_type, col_state, variable, agg_type, round_value, 'Dispatcher')
+    key = cube.key('dispatcher_user', type_trip, freq, variable, agg_type, equip, cat_select)
+    overview_map, ratio_map_bc, ratio_map_bi, diff_map_bc, diff_map_bi = plot_service.generate_state_sp_maps(df_merged, col_value, col_agg_type, col_state, variable, agg_type, round_value, 'Dispatcher', key)
     
     ui_service.render_results_sp(overview_map, ratio_map_bc, ratio_map_bi, diff_map_bc, diff_map_bi, variable, agg_type, cat_select)
 
@@ -12,7 +12,6 @@ def app():
     
     # Obtener datos de la sesión
     date_range, freq = st.session_state['date_range'], st.session_state['freq']
-    f = ui_service.get_frequency(freq)
     
     # UI para seleccionar filtros
     type_trip, variable, agg_type, col_value_g, col_agg_type, col_value = ui_service.render_filters(plus_tt=['Relationship In/Out'])
@@ -20,6 +19,7 @@ def app():
     round_value = 0 if col_agg_type == 'days' else 2
     
     df, df_ind = data_service.load_data(date_range)
+    cube = data_service.get_cube(df, df_ind)
     
     col_state = 'destination' if type_trip == 'Inbound' else 'origin'
     col_ostate = 'origin' if type_trip == 'Inbound' else 'destination'
@@ -27,10 +27,10 @@ def app():
     state = st.selectbox("Select States", states)
     
     # Filtrar datos por estado y equipo seleccionado
-    df_filtered = data_service.filter_by_state(df, state, col_state)
-    df_filtered = data_service.filter_by_equip(df_filtered, equip)
+    df_filtered = cube.rows(**{col_state: state, 'equip': equip})
 
-    df_agg = data_service.aggregate_data_distance(df_filtered, col_ostate, f, freq, col_value, col_value_g, col_agg_type)
+    # Agregado por estado opuesto cortado del tensor origen × destino × equipo × periodo del dataset
+    df_agg = cube.distance(col_state, state, equip, freq, col_value, col_value_g, col_agg_type)
     df_agg[col_value] = df_agg[col_value_g] / df_agg[col_agg_type]
 
     bx_days = plot_service.generate_days_boxplot(df_filtered, col_value, variable, agg_type)
@@ -40,6 +40,7 @@ def app():
     var_order = st.radio("**Select variable to plot:**", options=[f"{variable} {agg_type}", 'Time', f'KPI Interaction'], horizontal=True)
     round_value = 2 if agg_type == 'Per Mile' else 0
     
-    map_distance = plot_service.generate_distance_maps(var_order, df_agg, col_value, col_agg_type, col_ostate, variable, agg_type, state)
+    key = cube.key(type_trip, state, equip, freq, variable, agg_type)
+    map_distance = plot_service.generate_distance_maps(var_order, df_agg, col_value, col_agg_type, col_ostate, variable, agg_type, state, key)
     ui_service.render_distance_maps(map_distance)   
     
\ No newline at end of file
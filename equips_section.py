@@ -17,6 +17,7 @@ def app():
     
     # Cargar datos
     df, df_ind = data_service.load_data(date_range)
+    cube = data_service.get_cube(df, df_ind)
     df, df_ind_filt, col_state = data_service.filter_data(df, df_ind, type_trip)
     
     # UI para seleccionar estado
@@ -24,17 +25,18 @@ def app():
     state = st.selectbox("**Select States**", ['ALL'] + states)
     
     # Procesar datos
-    df_merged = data_service.process_data(df, df_ind_filt, col_state, f, freq, col_value_g, col_agg_type, col_value, round_value)
+    df_merged = data_service.process_data(df, df_ind_filt, col_state, f, freq, col_value_g, col_agg_type, col_value, round_value, cube=cube)
     df_pivot = data_service.prepare_pivot_data(df_merged, col_state, f'{col_value}', round_value)
 
     # Filtrar datos por estado seleccionado
-    df_filtered = data_service.filter_by_state(df, state, col_state)
+    df_filtered = df if state == 'ALL' else cube.rows(**{col_state: state})
 
     # Generar gráficos
     color_dict = data_service.get_equip_color_dict()
+    key = cube.key(type_trip, freq, variable, agg_type)
     violin_plot = plot_service.generate_violin_plot(df_filtered, col_value, variable, agg_type, color_dict)
-    map_color_dis = plot_service.generate_map_color_dis(df_pivot, col_state, color_dict, 'best_equip_c', round_value)
-    map_dis_bubble = plot_service.generate_map_dis_bubble(df_pivot, col_state, color_dict, 'best_equip_r', 'equip_color_r')
+    map_color_dis = plot_service.generate_map_color_dis(df_pivot, col_state, color_dict, 'best_equip_c', round_value, key)
+    map_dis_bubble = plot_service.generate_map_dis_bubble(df_pivot, col_state, color_dict, 'best_equip_r', 'equip_color_r', key)
     
     # Renderizar UI
     ui_service.render_results_eq(violin_plot, map_color_dis, map_dis_bubble, variable)
@@ -20,6 +20,7 @@ def app():
     round_value = 2 if col_agg_type == 'distance' else 0
     
     df, df_ind = data_service.load_data(date_range)
+    cube = data_service.get_cube(df, df_ind)
     
     ui_service.display_financial_metrics(df, equip, agg_type, round_value)
 
@@ -31,7 +32,7 @@ def app():
             df, df_ind_filt, col_state = data_service.filter_data(df, df_ind, tt)
 
             # Procesar datos
-            df_merged = data_service.process_data(df, df_ind_filt, col_state, f, freq, col_value_g, col_agg_type, col_value, round_value)
+            df_merged = data_service.process_data(df, df_ind_filt, col_state, f, freq, col_value_g, col_agg_type, col_value, round_value, cube=cube)
             
             # Filtrar datos por equipo seleccionado
             df_filtered = data_service.filter_by_equip(df_merged, equip)
@@ -46,7 +47,8 @@ def app():
         else:  
             df_in_out['ratio'] = df_in_out[f'{col_value}_c_in'] / df_in_out[f'{col_value}_c_out']
         
-        io_map = plot_service.generate_io_map(df_in_out, col_value, variable, agg_type)
+        key = cube.key(type_trip, freq, variable, agg_type, equip)
+        io_map = plot_service.generate_io_map(df_in_out, col_value, variable, agg_type, key)
         
         st.divider()
         st.write("<b>Relationship between the client Inbound trips and Outbound trips.</b>", unsafe_allow_html=True)
@@ -58,10 +60,11 @@ def app():
         df, df_ind_filt, col_state = data_service.filter_data(df, df_ind, type_trip)
 
         # Procesar datos
-        df_merged = data_service.process_data(df, df_ind_filt, col_state, f, freq, col_value_g, col_agg_type, col_value, round_value)
+        df_merged = data_service.process_data(df, df_ind_filt, col_state, f, freq, col_value_g, col_agg_type, col_value, round_value, cube=cube)
 
         # Filtrar datos por equipo seleccionado
         df_filtered = data_service.filter_by_equip(df_merged, equip)
 
-        client_map, ratio_map, diff_map = plot_service.generate_state_maps(df_filtered, col_value, col_agg_type, col_state, variable, agg_type)
+        key = cube.key(type_trip, freq, variable, agg_type, equip)
+        client_map, ratio_map, diff_map = plot_service.generate_state_maps(df_filtered, col_value, col_agg_type, col_state, variable, agg_type, key)
         ui_service.render_results_fp(client_map, ratio_map, diff_map, variable, agg_type)
\ No newline at end of file
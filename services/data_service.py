@@ -2,176 +2,439 @@ import pandas as pd
 import numpy as np
 import utils.functions as fn
 import utils.constants as c
+import utils.dictionaries as dic
+from utils.grouped_sum import grouped_sum, grouped_sum_tensor, grouped_sum_wide
+from utils.partition_index import PartitionIndex
 import streamlit as st
+import itertools
+import threading
+import weakref
+from concurrent.futures import Future
+from streamlit.runtime.scriptrunner import add_script_run_ctx
 import warnings
 warnings.filterwarnings("ignore")
 
+def submit_with_ctx(func, *args):
+    """Ejecuta func en un hilo nuevo con el contexto de la sesión de Streamlit y devuelve su Future.
+
+    El contexto se adjunta antes de arrancar el hilo y muere con él, así que ningún trabajo
+    posterior hereda la sesión (lo que pasaría con un hilo reutilizado de un pool).
+    """
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(func(*args))
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    thread = threading.Thread(target=run, name='load_data', daemon=True)
+    add_script_run_ctx(thread)
+    thread.start()
+    return future
+
 def load_data(date_range):
-    """Carga y filtra los datos según el tipo de viaje."""
+    """Carga en paralelo los datos de la empresa y de la industria."""
     
-    df = fn.get_company_history(date_range)
-    df_ind = fn.get_indicators(date_range)
+    future_df = submit_with_ctx(fn.get_company_history, date_range)
+    future_ind = submit_with_ctx(fn.get_indicators, date_range)
     
-    return df, df_ind
+    return future_df.result(), future_ind.result()
 
 def filter_data(df, df_ind, type_trip):
     
     if type_trip == 'Inbound':
         col_state = 'destination'
-        df_ind_filt = df_ind.query("res_origin == 'COUNTRY' & res_destination == 'STATE'")
+        df_ind_filt = df_ind[(df_ind['res_origin'] == 'COUNTRY') & (df_ind['res_destination'] == 'STATE')]
     else:
         col_state = 'origin'
-        df_ind_filt = df_ind.query("res_origin == 'STATE' & res_destination == 'COUNTRY'")
+        df_ind_filt = df_ind[(df_ind['res_origin'] == 'STATE') & (df_ind['res_destination'] == 'COUNTRY')]
 
     return df, df_ind_filt, col_state
 
-def process_data(df, df_ind_filt, col_group, f, freq, col_value_g, col_agg_type, col_value, round_value):
-    """Agrega y fusiona los datos de la empresa y de la industria."""
+class AggregationCube:
+    """Cubo de agregados (periodo × estado × equipo) de la empresa y de la industria.
+
+    Cada combinación de columna de estado y frecuencia se agrega una sola vez por
+    dataset; los cambios de filtros en las páginas se resuelven como cortes del cubo.
+    Los filtros por fila de los viajes usan el índice de particiones del dataset.
+    """
+
+    _versions = itertools.count(1)
+
+    def __init__(self, df, df_ind):
+        self._df = weakref.ref(df)
+        self._df_ind = weakref.ref(df_ind)
+        self.version = next(AggregationCube._versions)
+        self.partitions = PartitionIndex(df)
+        self._cells = {}
+        self._lock = threading.Lock()
+
+    def belongs_to(self, df, df_ind):
+        return self._df() is df and self._df_ind() is df_ind
+
+    def key(self, *params):
+        """Clave de caché de una figura: versión del dataset más los filtros de la página."""
+        return (self.version,) + params
+
+    def get(self, col_group, freq, wide=False):
+        """Agregados completos para la columna de estado y la frecuencia.
+
+        Devuelve (df_agg, df_ind_agg), o con wide=True el DataFrame alineado *_c/*_i.
+        """
+        key = (col_group, freq, wide)
+        with self._lock:
+            if key not in self._cells:
+                type_trip = 'Inbound' if col_group == 'destination' else 'Outbound'
+                df, df_ind_filt, _ = filter_data(self._df(), self._df_ind(), type_trip)
+                self._cells[key] = aggregate_data(df, df_ind_filt, col_group, dic.fp_frequency[freq.lower()], freq, wide=wide)
+            return self._cells[key]
+
+    def metrics(self, col_group, freq):
+        """Tabla ancha con *_c, *_i, ratio y diff de las nueve combinaciones de variable y normalización."""
+        key = (col_group, freq, 'metrics')
+        df_wide = self.get(col_group, freq, wide=True)
+        with self._lock:
+            if key not in self._cells:
+                self._cells[key] = compute_metrics(df_wide)
+            return self._cells[key]
+
+    def rows(self, **criteria):
+        """Viajes de la empresa que cumplen col == valor para cada criterio."""
+        return self.partitions.select(**criteria)
+
+    def category_summary(self, equip, col_value, cat_col):
+        """Resumen por categoría (mediana, valores distintos) de los viajes del equipo."""
+        key = ('categories', equip, col_value, cat_col)
+        with self._lock:
+            if key not in self._cells:
+                self._cells[key] = category_summary(self.rows(equip=equip), col_value, cat_col)
+            return self._cells[key]
+
+    def category_comparison(self, col_group, freq, equip, cat_col, col_value, col_value_g, col_agg_type):
+        """Comparación de todas las categorías del equipo, calculada una vez por combinación de filtros."""
+        key = ('comparison', col_group, freq, equip, cat_col, col_value)
+        df_agg, df_ind_agg = self.slice(col_group, freq, equip)
+        with self._lock:
+            if key not in self._cells:
+                self._cells[key] = compare_categories(self.rows(equip=equip), df_agg, df_ind_agg, col_group, dic.fp_frequency[freq.lower()],
+                                                      freq, col_value, col_value_g, col_agg_type, cat_col)
+            return self._cells[key]
+
+    def distance(self, col_state, state, equip, freq, col_value, col_value_g, col_agg_type):
+        """Agregado de Hauling Performance para el estado y el equipo, cortado del tensor de la frecuencia."""
+        key = ('distance', freq)
+        with self._lock:
+            if key not in self._cells:
+                self._cells[key] = DistanceTensor(self._df(), dic.fp_frequency[freq.lower()], freq)
+            tensor = self._cells[key]
+        return distance_kpis(tensor.slice(col_state, state, equip), col_value, col_value_g, col_agg_type)
+
+    def slice(self, col_group, freq, equip=None):
+        """Corte del cubo, opcionalmente para un solo equipo."""
+        df_agg, df_ind_agg = self.get(col_group, freq)
+        if equip is not None:
+            df_agg = df_agg[df_agg['equip'] == equip]
+            df_ind_agg = df_ind_agg[df_ind_agg['equip'] == equip]
+        return df_agg, df_ind_agg
+
+_cubes = {}
+_cubes_lock = threading.Lock()
+
+def get_cube(df, df_ind):
+    """Devuelve el cubo de agregación del dataset, creándolo la primera vez."""
     
-    df, df_ind_agg = aggregate_data(df, df_ind_filt, col_group, f, freq)
-
-    merge_cols = ["start_date", col_group, "equip", col_value_g] + ([col_agg_type] if col_agg_type else [])
-
-    df_merged = pd.merge(
-        df[merge_cols],
-        df_ind_agg[merge_cols],
-        on=["start_date", col_group, "equip"], suffixes=("_c", "_i")
-    )
-
-    if col_agg_type:
-        df_merged[f"{col_value}_c"] = df_merged[f"{col_value_g}_c"] / df_merged[f"{col_agg_type}_c"]
-        df_merged[f"{col_value}_i"] = df_merged[f"{col_value_g}_i"] / df_merged[f"{col_agg_type}_i"]
+    key = (id(df), id(df_ind))
+    with _cubes_lock:
+        cube = _cubes.get(key)
+        if cube is None or not cube.belongs_to(df, df_ind):
+            cube = AggregationCube(df, df_ind)
+            _cubes[key] = cube
+            weakref.finalize(df, _cubes.pop, key, None)
+    return cube
+
+# (col_value_g, col_agg_type, col_value) de cada combinación variable × normalización
+METRIC_COMBOS = [(col_value_g, col_agg_type, dic.bs_col_value[f"{variable}_{agg_type.replace(' ', '')}"])
+                 for variable, col_value_g in dic.fp_col_value.items()
+                 for agg_type, col_agg_type in dic.fp_agg_type.items()]
+
+def compute_metrics(df_wide):
+    """Calcula *_c, *_i, ratio_* y diff_* de todas las combinaciones sobre el agregado ancho."""
+    
+    metrics = {}
+    for col_value_g, col_agg_type, col_value in METRIC_COMBOS:
+        for suff in ('_c', '_i'):
+            if col_agg_type:
+                metrics[f"{col_value}{suff}"] = df_wide[f"{col_value_g}{suff}"] / df_wide[f"{col_agg_type}{suff}"]
+            else:
+                metrics[f"{col_value}{suff}"] = df_wide[f"{col_value_g}{suff}"]
+        metrics[f"ratio_{col_value}"] = metrics[f"{col_value}_c"] / metrics[f"{col_value}_i"]
+        metrics[f"diff_{col_value}"] = metrics[f"{col_value}_c"] - metrics[f"{col_value}_i"]
+
+    new_cols = {col: values for col, values in metrics.items() if col not in df_wide.columns}
+    return pd.concat([df_wide, pd.DataFrame(new_cols, index=df_wide.index)], axis=1)
+
+def process_data(df, df_ind_filt, col_group, f, freq, col_value_g, col_agg_type, col_value, round_value, cube=None):
+    """Agrega y fusiona los datos de la empresa y de la industria.
+
+    Con cube las métricas de todas las combinaciones ya están calculadas y solo se seleccionan.
+    """
+    
+    if cube is not None:
+        df_metrics = cube.metrics(col_group, freq)
     else:
-        df_merged[f"{col_value}_c"] = df_merged[f"{col_value_g}_c"]
-        df_merged[f"{col_value}_i"] = df_merged[f"{col_value_g}_i"]
+        df_metrics = compute_metrics(aggregate_data(df, df_ind_filt, col_group, f, freq, wide=True))
 
-    df_merged["ratio"] = df_merged[f"{col_value}_c"] / df_merged[f"{col_value}_i"]
-    df_merged["diff"] = df_merged[f"{col_value}_c"] - df_merged[f"{col_value}_i"]
+    value_cols = [col_value_g] + ([col_agg_type] if col_agg_type else [])
+    cols = ["start_date", col_group, "equip"] + [f"{col}{suff}" for suff in ("_c", "_i") for col in value_cols]
+    cols += [col for col in (f"{col_value}_c", f"{col_value}_i") if col not in cols]
 
+    df_merged = df_metrics[cols + [f"ratio_{col_value}", f"diff_{col_value}"]].rename(columns={f"ratio_{col_value}": "ratio", f"diff_{col_value}": "diff"})
     df_merged = df_merged.round({"ratio":2, "diff":round_value, f"{col_value}_c":round_value, f"{col_value}_i":round_value})
 
     return df_merged
 
-def sort_day_week(df):
-    """Ordena los días de la semana en el DataFrame."""
+MEASURES = ['income', 'cost', 'profit', 'days', 'distance']
+
+# Códigos enteros de periodo (calculados en la ingesta) por los que se agrupa cada frecuencia
+PERIOD_CODES = {'Y': ['year'], 'Q': ['year', 'quarter'], 'M': ['year', 'month'], 'W': ['iso_year', 'iso_week'], 'D': ['day']}
+# Motor de las sumas por grupo: 'numpy' (bincount sobre la clave compuesta) o 'pandas' (groupby)
+AGG_BACKEND = 'numpy'
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+def period_codes(f, freq):
+    """Columnas de código por las que se agrupa la frecuencia seleccionada."""
+    if freq == 'Total':
+        return []
+    if freq == 'Daily':
+        return ['weekday']
+    return PERIOD_CODES[f]
+
+def period_labels(df_agg, f, freq):
+    """Etiqueta start_date de cada grupo a partir de sus códigos (igual a la de pd.Grouper)."""
     
-    df = df.set_index('day_of_week')
-    valid_days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    existing_days = df.index.intersection(valid_days)
-    df = df.loc[existing_days].reset_index()
+    if freq == 'Daily':
+        return np.array(DAY_NAMES, dtype=object)[df_agg['weekday'].to_numpy()]
+    if f == 'D':
+        return pd.to_datetime(df_agg['day'].to_numpy(), unit='D')
+    if f == 'W':
+        # El lunes de la semana ISO 1 es el de la semana que contiene el 4 de enero
+        jan4 = pd.to_datetime(pd.DataFrame({'year': df_agg['iso_year'], 'month': 1, 'day': 4}))
+        offset = (df_agg['iso_week'].astype('int64') - 1) * 7 + 6 - jan4.dt.weekday
+        return (jan4 + pd.to_timedelta(offset, unit='D')).to_numpy()
     
-    return df
-
-def aggregate_data(df, df_ind_filt, col_group, f, freq, raw_list=[]):
-    """Realiza la agregación de datos según la frecuencia especificada."""
+    if f == 'Y':
+        month = 12
+    elif f == 'Q':
+        month = df_agg['quarter'] * 3
+    else:
+        month = df_agg['month']
+    month_start = pd.to_datetime(pd.DataFrame({'year': df_agg['year'], 'month': month, 'day': 1}))
+    return (month_start + pd.offsets.MonthEnd(0)).to_numpy()
 
-    df['start_date'] = pd.to_datetime(df['start_date'])
-    df_ind_filt['start_date'] = pd.to_datetime(df_ind_filt['start_date'])
+def group_by_period(df, cols, f, freq, agg=None, backend=None):
+    """Agrupa por los códigos de periodo y cols, y etiqueta cada grupo con start_date."""
+    
+    codes = period_codes(f, freq)
+    if any(code not in df.columns for code in codes):
+        df = fn.add_period_codes(df.copy())
+    backend = backend or AGG_BACKEND
+    if agg is None and backend == 'numpy':
+        df_agg = grouped_sum(df, codes + cols, MEASURES)
+    else:
+        grouped = df.groupby(codes + cols, observed=True)
+        df_agg = (grouped[MEASURES].sum() if agg is None else grouped.agg(**agg)).reset_index()
     
     if freq == 'Total':
-        min_date = df['start_date'].min().date()
-        df_agg = df.groupby([col_group, 'equip'])[['income', 'cost', 'profit', 'days', 'distance']].sum().reset_index()
-        df_ind_agg = df_ind_filt.groupby([col_group, 'equip'])[['income', 'cost', 'profit', 'days', 'distance']].sum().reset_index()
-        df_agg['start_date'] = min_date
-        df_ind_agg['start_date'] = min_date
-    elif freq == 'Daily':
-        df['day_of_week'] = df['start_date'].dt.day_name()
-        df_agg = df.groupby(['day_of_week', col_group, 'equip'])[['income', 'cost', 'profit', 'days', 'distance']].sum().reset_index()
-        df_agg = sort_day_week(df_agg)
-        df_agg = df_agg.rename(columns={'day_of_week': 'start_date'})
-        
-        df_ind_filt['day_of_week'] = df_ind_filt['start_date'].dt.day_name()
-        df_ind_agg = df_ind_filt.groupby(['day_of_week', col_group, 'equip'])[['income', 'cost', 'profit', 'days', 'distance']].sum().reset_index()
-        df_ind_agg = sort_day_week(df_ind_agg)
-        df_ind_agg = df_ind_agg.rename(columns={'day_of_week': 'start_date'})
-        
+        df_agg['start_date'] = df['start_date'].min().date()
     else:
-        df_agg = df.groupby([pd.Grouper(key='start_date', freq=f), col_group, 'equip'])[['income', 'cost', 'profit', 'days', 'distance']].sum().reset_index()
-        df_ind_agg = df_ind_filt.groupby([pd.Grouper(key='start_date', freq=f), col_group, 'equip'])[['income', 'cost', 'profit', 'days', 'distance']].sum().reset_index()
+        df_agg.insert(0, 'start_date', period_labels(df_agg, f, freq))
+        df_agg = df_agg.drop(columns=codes)
     
-    return df_agg, df_ind_agg
+    return df_agg
 
-def aggregate_data_distance(df, col_group, f, freq, col_value, col_value_g, col_agg_type):
-    """Realiza la agregación de datos según la frecuencia especificada."""
+def aggregate_data(df, df_ind_filt, col_group, f, freq, raw_list=[], backend=None, wide=False):
+    """Realiza la agregación de datos según la frecuencia especificada.
 
-    df['start_date'] = pd.to_datetime(df['start_date'])
+    backend elige el motor de las sumas ('numpy' o 'pandas'); por defecto AGG_BACKEND.
+    Con wide=True devuelve un solo DataFrame alineado con columnas *_c (empresa) e *_i (industria).
+    """
+    if wide:
+        return aggregate_data_wide(df, df_ind_filt, col_group, f, freq, backend=backend)
 
+    df_agg = group_by_period(df, [col_group, 'equip'], f, freq, backend=backend)
+    df_ind_agg = group_by_period(df_ind_filt, [col_group, 'equip'], f, freq, backend=backend)
+    
     if freq == 'Total':
-        min_date = df['start_date'].min().date()
-        df_agg = df.groupby([col_group, 'equip']).agg(
-            income=('income', 'sum'),
-            profit=('profit', 'sum'),
-            cost=('cost', 'sum'),
-            distance=('distance', 'sum'),
-            days=('days', 'sum'),
-            days_mean=('days', 'mean')).reset_index()
-        df_agg['start_date'] = min_date
-        
-    elif freq == 'Daily':
-        df['day_of_week'] = df['start_date'].dt.day_name()
-        df_agg = df.groupby(['day_of_week', col_group, 'equip'])[['income', 'cost', 'profit', 'days', 'distance']].agg(
-            income=('income', 'sum'),
-            profit=('profit', 'sum'),
-            cost=('cost', 'sum'),
-            distance=('distance', 'sum'),
-            days=('days', 'sum'),
-            days_mean=('days', 'mean')).reset_index()
-        df_agg = sort_day_week(df_agg)
-        df_agg = df_agg.rename(columns={'day_of_week': 'start_date'})
-        df_ind_agg = sort_day_week(df_ind_agg)
-        df_ind_agg = df_ind_agg.rename(columns={'day_of_week': 'start_date'})
-        
+        # Ambas fuentes se etiquetan con la fecha inicial de la empresa
+        df_ind_agg['start_date'] = df['start_date'].min().date()
+    
+    return df_agg, df_ind_agg
+
+def aggregate_data_wide(df, df_ind_filt, col_group, f, freq, backend=None):
+    """Agrega empresa e industria en una sola pasada y las alinea por periodo, estado y equipo.
+
+    Las dos fuentes se reducen sobre el mismo espacio de claves y salen en columnas *_c/*_i;
+    solo se conservan las celdas presentes en ambas, igual que el merge interno que hacía
+    process_data.
+    """
+    codes = period_codes(f, freq)
+    if any(code not in df.columns for code in codes):
+        df = fn.add_period_codes(df.copy())
+    if any(code not in df_ind_filt.columns for code in codes):
+        df_ind_filt = fn.add_period_codes(df_ind_filt.copy())
+    keys = codes + [col_group, 'equip']
+
+    if (backend or AGG_BACKEND) == 'numpy':
+        df_wide = grouped_sum_wide({'c': df, 'i': df_ind_filt}, keys, MEASURES)
     else:
-        df_agg = df.groupby([pd.Grouper(key='start_date', freq=f), col_group, 'equip']).agg(
-            income=('income', 'sum'),
-            profit=('profit', 'sum'),
-            cost=('cost', 'sum'),
-            distance=('distance', 'sum'),
-            days=('days', 'sum'),
-            days_mean=('days', 'mean')).reset_index()
-        
+        # Las fuentes se apilan marcadas con 'source' y se agrupan juntas
+        stacked = pd.concat([df[keys + MEASURES], df_ind_filt[keys + MEASURES].astype({col: df[col].dtype for col in [col_group, 'equip']})], ignore_index=True)
+        stacked['source'] = pd.Categorical.from_codes(np.repeat(np.int8([0, 1]), [len(df), len(df_ind_filt)]), categories=['c', 'i'])
+        df_wide = stacked.groupby(keys + ['source'], observed=True)[MEASURES].sum().unstack('source').dropna()
+        df_wide.columns = [f"{measure}_{source}" for measure, source in df_wide.columns]
+        df_wide = df_wide.reset_index()
+
+    for col in [col_group, 'equip']:
+        # Mismos tipos que producía el merge de los dos agregados por separado
+        df_wide[col] = df_wide[col].astype(df_ind_filt[col].dtype)
+    df_wide = df_wide.astype({f"{measure}_c": df[measure].dtype for measure in MEASURES})
+
+    if freq == 'Total':
+        df_wide.insert(0, 'start_date', df['start_date'].min().date())
+    else:
+        df_wide.insert(0, 'start_date', period_labels(df_wide, f, freq))
+        df_wide = df_wide.drop(columns=codes)
+
+    return df_wide
+
+def distance_kpis(df_agg, col_value, col_value_g, col_agg_type):
+    """Agrega al agregado de distancia el valor normalizado y el KPI comb/comb2 (escalado a 10-100)."""
+    
     df_agg[col_value] = df_agg[col_value_g] / df_agg[col_agg_type]
     
     df_agg['days_mean'] = np.ceil(df_agg['days_mean'])
-    df_agg['comb'] =df_agg[col_value] / df_agg['days_mean']
+    df_agg['comb'] = df_agg[col_value] / df_agg['days_mean']
     comb_min, comb_max = df_agg['comb'].min(), df_agg['comb'].max()
-    df_agg['comb2'] = df_agg['comb'].apply(lambda x: (x-comb_min)/(comb_max-comb_min))
-    df_agg['comb2'] = df_agg['comb2']*90
-    df_agg['comb2'] = df_agg['comb2'] + 10
+    df_agg['comb2'] = (df_agg['comb'] - comb_min) / (comb_max - comb_min) * 90 + 10
            
     return df_agg
 
+def aggregate_data_distance(df, col_group, f, freq, col_value, col_value_g, col_agg_type):
+    """Realiza la agregación de datos según la frecuencia especificada."""
+
+    df_agg = group_by_period(df, [col_group, 'equip'], f, freq, agg=dict(
+            income=('income', 'sum'),
+            profit=('profit', 'sum'),
+            cost=('cost', 'sum'),
+            distance=('distance', 'sum'),
+            days=('days', 'sum'),
+            days_mean=('days', 'mean')))
+        
+    return distance_kpis(df_agg, col_value, col_value_g, col_agg_type)
+
+DISTANCE_MEASURES = ['income', 'profit', 'cost', 'distance', 'days']
+
+class DistanceTensor:
+    """Tensor denso [origen, destino, equipo, periodo..., medida] de los viajes de la empresa.
+
+    Los ejes de estado usan las categorías de origin/destination (los estados de
+    files/state_coords.json) y el periodo tiene un eje por código de la frecuencia. Elegir
+    otro estado o equipo en Hauling Performance es un corte del tensor.
+    """
+
+    def __init__(self, df, f, freq):
+        self.f, self.freq = f, freq
+        self.codes = period_codes(f, freq)
+        if any(code not in df.columns for code in self.codes):
+            df = fn.add_period_codes(df.copy())
+
+        keys = ['origin', 'destination', 'equip'] + self.codes
+        self.tensor, self.counts, self.axes = grouped_sum_tensor(df, keys, DISTANCE_MEASURES)
+        self.dtypes = {measure: df[measure].dtype for measure in DISTANCE_MEASURES}
+
+        if freq == 'Total':
+            # Fecha del primer viaje de cada celda, para etiquetar el total como el agregado filtrado
+            first = df.groupby(['origin', 'destination', 'equip'], observed=True)['start_date'].min()
+            self.first_dates = np.full(self.counts.shape, np.datetime64('NaT'), dtype='datetime64[ns]')
+            index = [pd.Index(np.asarray(axis)).get_indexer(first.index.get_level_values(i)) for i, axis in enumerate(self.axes[:3])]
+            self.first_dates[tuple(index)] = first.to_numpy(dtype='datetime64[ns]')
+
+    def _position(self, axis, value):
+        positions = np.flatnonzero(np.asarray(self.axes[axis]) == value)
+        return positions[0] if len(positions) else None
+
+    def slice(self, col_state, state, equip):
+        """Agregado por periodo y estado opuesto, como aggregate_data_distance sobre los viajes filtrados."""
+        state_axis = 0 if col_state == 'origin' else 1
+        other_axis = 1 - state_axis
+        col_ostate = 'destination' if col_state == 'origin' else 'origin'
+
+        e = self._position(2, equip)
+        s = slice(None) if state == 'ALL' else self._position(state_axis, state)
+        index = [slice(None), slice(None), e]
+        index[state_axis] = s
+        index = tuple(index)
+
+        # Corte [estado opuesto, periodo..., medida] del estado y el equipo elegidos
+        if e is None or s is None:
+            sub_counts = np.zeros((len(self.axes[other_axis]),) + self.counts.shape[3:], dtype=self.counts.dtype)
+            sub = np.zeros(sub_counts.shape + (len(DISTANCE_MEASURES),))
+        else:
+            sub, sub_counts = self.tensor[index], self.counts[index]
+            if state == 'ALL':
+                sub, sub_counts = sub.sum(axis=state_axis), sub_counts.sum(axis=state_axis)
+
+        # Orden de groupby: códigos de periodo, luego estado
+        sub, sub_counts = np.moveaxis(sub, 0, -2), np.moveaxis(sub_counts, 0, -1)
+        cells = np.nonzero(sub_counts > 0)
+        values, n_rows = sub[cells], sub_counts[cells]
+
+        df_agg = pd.DataFrame({code: np.asarray(axis)[cell] for code, axis, cell in zip(self.codes, self.axes[3:], cells[:-1])})
+        df_agg[col_ostate] = self.axes[other_axis][cells[-1]]
+        df_agg['equip'] = self.axes[2][np.full(len(n_rows), e or 0)]
+        for i, measure in enumerate(DISTANCE_MEASURES):
+            df_agg[measure] = values[:, i].astype(self.dtypes[measure])
+        df_agg['days_mean'] = (values[:, DISTANCE_MEASURES.index('days')] / n_rows).astype(self.dtypes['days'])
+
+        if self.freq == 'Total':
+            dates = self.first_dates[index] if len(df_agg) else np.array([], dtype='datetime64[ns]')
+            dates = dates[~np.isnat(dates)]
+            df_agg['start_date'] = pd.Timestamp(dates.min()).date() if len(dates) else None
+        else:
+            df_agg.insert(0, 'start_date', period_labels(df_agg, self.f, self.freq))
+            df_agg = df_agg.drop(columns=self.codes)
+
+        return df_agg
+
 def aggregate_data_raw(df, col_group, f, freq, raw_list=[]):
     """Realiza la agregación de datos según la frecuencia especificada."""
 
-    df['start_date'] = pd.to_datetime(df['start_date'])
+    return group_by_period(df, [col_group, 'equip'] + raw_list, f, freq)
 
-    if freq == 'Total':
-        min_date = df['start_date'].min().date()
-        df_agg = df.groupby([col_group, 'equip'] + raw_list)[['income', 'cost', 'profit', 'days', 'distance']].sum().reset_index()
-        df_agg['start_date'] = min_date
-    elif freq == 'Daily':
-        df['day_of_week'] = df['start_date'].dt.day_name()
-        df_agg = df.groupby(['day_of_week', col_group, 'equip'] + raw_list)[['income', 'cost', 'profit', 'days', 'distance']].sum().reset_index()
-        df_agg = sort_day_week(df_agg)
-        df_agg = df_agg.rename(columns={'day_of_week': 'start_date'})
-    else:
-        df_agg = df.groupby([pd.Grouper(key='start_date', freq=f), col_group, 'equip'] + raw_list)[['income', 'cost', 'profit', 'days', 'distance']].sum().reset_index()
+def category_summary(df, col_value, cat_col):
+    """Mediana y cantidad de valores distintos de col_value por categoría, en una sola agrupación."""
+    
+    return df.groupby([cat_col], observed=True).agg(
+        median=(col_value, 'median'),
+        count=(col_value, 'nunique')).reset_index()
 
-    return df_agg
+def get_top_categories(df, col_value, cat_col, cube=None, equip=None):
+    """Realiza la agregación de datos según broker_shipper.
 
-def get_top_categories(df, col_value, cat_col):
-    """Realiza la agregación de datos según broker_shipper."""
+    El umbral de cantidad se busca sobre el resumen por categoría; con cube el resumen
+    sale de la caché del dataset para el equipo dado.
+    """
+
+    if cube is not None:
+        df_summary = cube.category_summary(equip, col_value, cat_col)
+    else:
+        df_summary = category_summary(df, col_value, cat_col)
 
     for i in range(6, -1, -1):
         
-        df_agg = df.groupby([cat_col]).agg(
-            median=(col_value, 'median'),
-            count=(col_value, 'nunique')).reset_index().query("count >= @i").sort_values(by='median', ascending=False)
-    
-        df_agg_out = df.groupby([cat_col]).agg(
-                median=(col_value, 'median'),
-                count=(col_value, 'nunique')).reset_index().query("count < @i").sort_values(by='median', ascending=False)
+        df_agg = df_summary[df_summary['count'] >= i].sort_values(by='median', ascending=False)
+        df_agg_out = df_summary[df_summary['count'] < i].sort_values(by='median', ascending=False)
 
         if len(df_agg) > 5:
             break
@@ -183,35 +446,48 @@ def get_top_categories(df, col_value, cat_col):
        
     return cat, categories
 
+def format_number(values, round_value):
+    """Formatea cada valor con separador de miles y round_value decimales."""
+    spec = f",.{round_value}f"
+    return pd.Series([format(value, spec) for value in values.to_numpy()], index=values.index, dtype=object)
+
 def prepare_pivot_data(df_merged, col_group, col_value, round_value):
     """Prepara los datos pivoteados para visualización en gráficos."""
-    df_pivot_i = df_merged.pivot_table(index=[col_group, 'start_date'], values=f"{col_value}_i", columns="equip").reset_index()
-    df_pivot_c = df_merged.pivot_table(index=[col_group, 'start_date'], values=f"{col_value}_c", columns="equip").reset_index()
-    df_pivot_r = df_merged.pivot_table(index=[col_group, 'start_date'], values='ratio', columns="equip").reset_index()
     
-    df_pivot = pd.merge(df_pivot_c, df_pivot_i, on=[col_group, 'start_date'], suffixes=('_c', '_i'))
-    df_pivot = pd.merge(df_pivot, df_pivot_r, on=[col_group, 'start_date'], suffixes=('', '_r'))
+    # Un solo unstack de las tres medidas; las columnas salen como {equip}_c, {equip}_i y {equip}
+    values = {f"{col_value}_c": '_c', f"{col_value}_i": '_i', 'ratio': ''}
+    df_pivot = df_merged.set_index([col_group, 'start_date', 'equip'])[list(values)].unstack('equip')
+    df_pivot = df_pivot.sort_index(axis=1, level=['equip'], sort_remaining=False).reindex(columns=list(values), level=0)
+    
+    # Igual que el merge interno de los tres pivotes: cada bloque necesita al menos un valor
+    present = np.logical_and.reduce([df_pivot[value].notna().any(axis=1).to_numpy() for value in values])
+    df_pivot = df_pivot[present]
+    df_pivot.columns = pd.Index([f"{equip}{values[value]}" for value, equip in df_pivot.columns], name='equip')
+    df_pivot = df_pivot.reset_index()
 
     if 'cost' in col_value:
         df_pivot["best_equip_c"] = df_pivot[['REEFER_c', 'VAN_c', 'FLATBED_c']].idxmin(axis=1)
     else:
         df_pivot["best_equip_c"] = df_pivot[['REEFER_c', 'VAN_c', 'FLATBED_c']].idxmax(axis=1)
         
-    df_pivot["best_equip_c"] = df_pivot["best_equip_c"].apply(lambda x: x.split('_')[0])
+    df_pivot["best_equip_c"] = df_pivot["best_equip_c"].str.split('_').str[0]
     df_pivot["best_equip_r"] = df_pivot[['REEFER', 'VAN', 'FLATBED']].idxmax(axis=1)
-    df_pivot['equip_color_r'] = df_pivot[['REEFER', 'VAN', 'FLATBED']].max(axis=1) > 1
-    df_pivot['equip_color_r'] = df_pivot['equip_color_r'].map({True: 'green', False: 'red'})
+    df_pivot['equip_color_r'] = np.where(df_pivot[['REEFER', 'VAN', 'FLATBED']].max(axis=1) > 1, 'green', 'red').astype(object)
     
     df_pivot = df_pivot.fillna(0)
     
     for equip in ['REEFER', 'VAN', 'FLATBED']:
-        df_pivot[f'{equip}_r'] = df_pivot.apply(lambda x: 
-                            f"{x[equip]}({c.client}:{x[f'{equip}_c']:,.{round_value}f}/Ind:{x[f'{equip}_i']:,.{round_value}f})" 
-                            if x[equip] > 0 else '', axis=1)
+        labels = (df_pivot[equip].astype(str) + f"({c.client}:" + format_number(df_pivot[f'{equip}_c'], round_value)
+                  + "/Ind:" + format_number(df_pivot[f'{equip}_i'], round_value) + ")")
+        df_pivot[f'{equip}_r'] = labels.where(df_pivot[equip] > 0, '')
  
     return df_pivot
 
-def merge_raw_agg(df_agg, df_agg_sp_filt, df_ind_agg, col_state, freq, col_value, col_value_g, col_agg_type):
+def merge_raw_agg(df_agg, df_agg_sp_filt, df_ind_agg, col_state, freq, col_value, col_value_g, col_agg_type, cat_col=None):
+    """Compara los agregados de una categoría (broker/dispatcher) con la empresa y la industria.
+
+    Con cat_col se conserva esa columna, para comparar todas las categorías a la vez.
+    """
         
     cols_group = [col_state] if freq == 'Total' else [col_state, 'start_date']
     df_merged = pd.merge(df_agg_sp_filt, df_agg, on=cols_group, how='left', suffixes=('_b', '_cf'))
@@ -231,6 +507,9 @@ def merge_raw_agg(df_agg, df_agg_sp_filt, df_ind_agg, col_state, freq, col_value
     if 'start_date_b' in df_merged.columns:
         df_merged['start_date'] = df_merged['start_date_b']
 
+    if cat_col is not None:
+        cols_keep = cols_keep + [cat_col]
+
     df_merged = df_merged[cols_keep]
 
     for suff in ['_b', '_cf', '']:
@@ -247,19 +526,38 @@ def merge_raw_agg(df_agg, df_agg_sp_filt, df_ind_agg, col_state, freq, col_value
 
     return df_merged
 
+class CategoryComparison:
+    """Comparación (ratio_bc, ratio_bi, diff_bc, diff_bi) de todas las categorías, indexada por categoría."""
+
+    def __init__(self, df_merged, cat_col):
+        self._df = df_merged.drop(columns=[cat_col])
+        self._positions = df_merged.groupby(cat_col, observed=True, sort=False).indices
+
+    def get(self, value):
+        """Filas de la categoría value, igual que filtrar y comparar solo esa categoría."""
+        positions = self._positions.get(value, np.array([], dtype='intp'))
+        return self._df.take(positions).reset_index(drop=True)
+
+def compare_categories(df_eq, df_agg, df_ind_agg, col_state, f, freq, col_value, col_value_g, col_agg_type, cat_col):
+    """Agrega por categoría y compara todas las categorías contra empresa e industria en una pasada."""
+    
+    df_agg_cat = aggregate_data_raw(df_eq, col_state, f, freq, raw_list=[cat_col])
+    df_merged = merge_raw_agg(df_agg, df_agg_cat, df_ind_agg, col_state, freq, col_value, col_value_g, col_agg_type, cat_col=cat_col)
+    return CategoryComparison(df_merged, cat_col)
+
 def filter_by_equip(df, equip):
     """Filtra los datos por el equipo seleccionado."""
-    return df.query(f"equip == '{equip}'")
+    return df[df['equip'] == equip]
 
 def filter_by_state(df, state, col_state):
     """Filtra los datos por el estado seleccionado."""
     if state != 'ALL':
-        return df.query(f"{col_state} == '{state}'")
+        return df[df[col_state] == state]
     return df
 
 def filter_by_cat(df, col_cat, value):
     """Filtra los datos por el equipo seleccionado."""
-    return df.query(f"{col_cat} == '{value}'")
+    return df[df[col_cat] == value]
 
 def get_equip_color_dict():
     """Devuelve un diccionario con los colores asociados a cada tipo de equipo."""
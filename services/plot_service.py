@@ -8,7 +8,7 @@ warnings.filterwarnings("ignore")
 def generate_violin_plot(df, col_value, variable, agg_type, color_dict):
     """Genera un gráfico de violín para visualizar la distribución de valores."""
     
-    df_agg = df.groupby(['equip']).agg(
+    df_agg = df.groupby(['equip'], observed=True).agg(
             median=(col_value, 'median'),
             count=(col_value, 'nunique')).reset_index().query("count > 6").sort_values(by='median', ascending=True)
     
@@ -26,15 +26,15 @@ def generate_violin_plot(df, col_value, variable, agg_type, color_dict):
         cl=None, color_dict=color_dict, keep_tick=keep_ticks
     )
 
-def generate_map_color_dis(df_pivot, col_state, color_dict, color_col, round_value):
+def generate_map_color_dis(df_pivot, col_state, color_dict, color_col, round_value, key):
     """Genera un mapa con colores diferenciados por mejor equipo."""
-    return grp.get_map_color_dis(df_pivot, col_state, color_col, color_dict, round_value)
+    return grp.get_map_color_dis(df_pivot, key, col_state, color_col, color_dict, round_value)
 
-def generate_map_dis_bubble(df_pivot, col_group, color_dict, color_col, color_bubble):
+def generate_map_dis_bubble(df_pivot, col_group, color_dict, color_col, color_bubble, key):
     """Genera un mapa con burbujas indicando la mejor elección de equipo."""
-    return grp.get_map_dis_bubble(df_pivot, col_group, color_dict, color_col, color_bubble)
+    return grp.get_map_dis_bubble(df_pivot, key, col_group, color_dict, color_col, color_bubble)
 
-def generate_state_maps(df_filtered, col_value, col_agg_type, col_state, variable, agg_type):
+def generate_state_maps(df_filtered, col_value, col_agg_type, col_state, variable, agg_type, key):
     """Genera mapas de estados para análisis de datos del cliente y la industria."""
     round_value = 2 if agg_type == 'Per Mile' else 0
     
@@ -43,25 +43,25 @@ def generate_state_maps(df_filtered, col_value, col_agg_type, col_state, variabl
 
     color_scale = 'Reds' if variable == 'Cost' else 'ylgn'
     
-    client_map = grp.get_map_states(df_filtered, f"{col_value}_c", col_state, 'start_date', f"{variable} {agg_type}", round_value, tooltip_client, color_scale=color_scale)
+    client_map = grp.get_map_states(df_filtered, key, f"{col_value}_c", col_state, 'start_date', f"{variable} {agg_type}", round_value, tooltip_client, color_scale=color_scale)
     
     tooltip_ratio = [
         ("ratio", f"<b>Ratio</b>", 2),
         (f"{col_value}_c", f"{variable} {agg_type} {c.client}", round_value),
         (f"{col_value}_i", f"{variable} {agg_type} Ind", round_value)
     ]
-    ratio_map = grp.get_map_states_h(df_filtered, 'ratio', col_state, 'start_date', 'Ratio', 2, tooltip_ratio, f"{col_value}_c")
+    ratio_map = grp.get_map_states_h(df_filtered, key, 'ratio', col_state, 'start_date', 'Ratio', 2, tooltip_ratio, f"{col_value}_c")
     
     tooltip_diff = [
         ("diff", f"<b>Difference</b>", round_value),
         (f"{col_value}_c", f"{variable} {agg_type} {c.client}", round_value),
         (f"{col_value}_i", f"{variable} {agg_type} Ind", round_value)
     ]
-    diff_map = grp.get_map_states_h(df_filtered, 'diff', col_state, 'start_date', 'Difference', round_value, tooltip_diff, f"{col_value}_c")
+    diff_map = grp.get_map_states_h(df_filtered, key, 'diff', col_state, 'start_date', 'Difference', round_value, tooltip_diff, f"{col_value}_c")
     
     return client_map, ratio_map, diff_map
 
-def generate_io_map(df_in_out, col_value, variable, agg_type):
+def generate_io_map(df_in_out, col_value, variable, agg_type, key):
     """Genera un mapa de relación In/Out basado en los datos de entrada y salida."""
     
     round_value = 2 if agg_type == 'Per Mile' else 0
@@ -73,7 +73,7 @@ def generate_io_map(df_in_out, col_value, variable, agg_type):
     ]
     
     io_map = grp.get_map_states_h(
-        df_in_out, 'ratio', 'destination', 'start_date', 'Relationship', 2, tooltip_io, f"{col_value}_c_in"
+        df_in_out, key, 'ratio', 'destination', 'start_date', 'Relationship', 2, tooltip_io, f"{col_value}_c_in"
     )
     
     return io_map
@@ -135,7 +135,7 @@ def generate_days_boxplot(dfr_filtered, col_value, variable, agg_type):
     
     return fig
 
-def generate_distance_maps(var_order, df_agg, col_value, col_agg_type, col_ostate, variable, agg_type, state):
+def generate_distance_maps(var_order, df_agg, col_value, col_agg_type, col_ostate, variable, agg_type, state, key):
     
     """Renderiza los mapas en función de la selección de var_order."""
     round_value = 2 if agg_type == 'Per Mile' else 0
@@ -160,7 +160,7 @@ def generate_distance_maps(var_order, df_agg, col_value, col_agg_type, col_ostat
         ]
         
         color_scale = 'Reds' if variable == 'Cost' else 'ylgn'
-        map = grp.get_map_states(df_agg, f"{col_value}", col_ostate, 'start_date', f"{variable} {agg_type}", round_value, tooltip_client, state, color_scale)
+        map = grp.get_map_states(df_agg, key, f"{col_value}", col_ostate, 'start_date', f"{variable} {agg_type}", round_value, tooltip_client, state, color_scale)
 
     elif var_order == 'Time':
         
@@ -269,7 +269,7 @@ def generate_distance_maps(var_order, df_agg, col_value, col_agg_type, col_ostat
             (f"{col_agg_type}", f'{col_agg_type.capitalize()}', 0),
             ('comb2', 'KPI', 2)
         ]
-        map = grp.get_map_states(df_agg, 'comb2', col_ostate, 'start_date', "KPI", 2, tooltip_client, state, color_scale='Blues')
+        map = grp.get_map_states(df_agg, key, 'comb2', col_ostate, 'start_date', "KPI", 2, tooltip_client, state, color_scale='Blues')
 
     return map
 
@@ -287,7 +287,7 @@ def generate_pag_boxplot(df, col_value, cat_value, variable, agg_type, name_var)
     
     return fig
 
-def generate_state_sp_maps(df_merged, col_value, col_agg_type, col_state, variable, agg_type, round_value, cat_name):
+def generate_state_sp_maps(df_merged, col_value, col_agg_type, col_state, variable, agg_type, round_value, cat_name, key):
     """Genera mapas de estados para análisis de datos del cliente y la industria basado en una columna specifica."""
     
     ttip_aggt = [] if col_agg_type == '' else [(f"{col_agg_type}_b", f'{col_agg_type.capitalize()}', 0)]
@@ -295,34 +295,34 @@ def generate_state_sp_maps(df_merged, col_value, col_agg_type, col_state, variab
     
     color_scale = 'Reds' if variable == 'Cost' else 'ylgn'
 
-    overview_map = grp.get_map_states(df_merged, f"{col_value}_b", col_state, 'start_date', f"{variable} {agg_type}", round_value, tooltip_client, color_scale=color_scale)
+    overview_map = grp.get_map_states(df_merged, key, f"{col_value}_b", col_state, 'start_date', f"{variable} {agg_type}", round_value, tooltip_client, color_scale=color_scale)
 
     tooltip_ratio_bc = [
         ("ratio_bc", f"<b>Ratio</b>", 2),
         (f"{col_value}_b", f"{variable} {agg_type} {cat_name}", round_value),
         (f"{col_value}_cf", f"{variable} {agg_type} {c.client}", round_value)
     ]
-    ratio_map_bc = grp.get_map_states_h(df_merged, 'ratio_bc', col_state, 'start_date', 'Ratio', 2, tooltip_ratio_bc, f"{col_value}_b")
+    ratio_map_bc = grp.get_map_states_h(df_merged, key, 'ratio_bc', col_state, 'start_date', 'Ratio', 2, tooltip_ratio_bc, f"{col_value}_b")
 
     tooltip_ratio_bi = [
         ("ratio_bi", f"<b>Ratio</b>", 2),
         (f"{col_value}_b", f"{variable} {agg_type} {cat_name}", round_value),
         (f"{col_value}", f"{variable} {agg_type} Ind", round_value)
     ]
-    ratio_map_bi = grp.get_map_states_h(df_merged, 'ratio_bi', col_state, 'start_date', 'Ratio', 2, tooltip_ratio_bi, f"{col_value}_b")
+    ratio_map_bi = grp.get_map_states_h(df_merged, key, 'ratio_bi', col_state, 'start_date', 'Ratio', 2, tooltip_ratio_bi, f"{col_value}_b")
 
     tooltip_diff_bc = [
         ("diff_bc", f"<b>Difference</b>", round_value),
         (f"{col_value}_b", f"{variable} {agg_type} {cat_name}", round_value),
         (f"{col_value}_cf", f"{variable} {agg_type} {c.client}", round_value)
     ]
-    diff_map_bc = grp.get_map_states_h(df_merged, 'diff_bc', col_state, 'start_date', 'Difference', round_value, tooltip_diff_bc, f"{col_value}_b")
+    diff_map_bc = grp.get_map_states_h(df_merged, key, 'diff_bc', col_state, 'start_date', 'Difference', round_value, tooltip_diff_bc, f"{col_value}_b")
 
     tooltip_diff_bi = [
         ("diff_bi", f"<b>Difference</b>", round_value),
         (f"{col_value}_b", f"{variable} {agg_type} {cat_name}", round_value),
         (f"{col_value}", f"{variable} {agg_type} Ind", round_value)
     ]
-    diff_map_bi = grp.get_map_states_h(df_merged, 'diff_bi', col_state, 'start_date', 'Difference', round_value, tooltip_diff_bi, f"{col_value}_b")
+    diff_map_bi = grp.get_map_states_h(df_merged, key, 'diff_bi', col_state, 'start_date', 'Difference', round_value, tooltip_diff_bi, f"{col_value}_b")
 
     return overview_map, ratio_map_bc, ratio_map_bi, diff_map_bc, diff_map_bi
@@ -259,20 +259,19 @@ def display_financial_metrics(df, equip, agg_type, round_value):
     ]
     
     opt = 'sum' if agg_type == 'Total' else 'mean'
-    df['aux'] = 'aux'
-    df_agg = df.query("equip == @equip").groupby(['aux']).agg({col_i: opt, col_c: opt, col_p: opt}).reset_index()
+    totals = df.loc[df['equip'] == equip, [col_i, col_c, col_p]].agg(opt)
     
     # Definir información de métricas
     metrics = [
         ("Income", col_i, "green"),
         ("Cost", col_c, "red"),
-        ("Profit", col_p, "green" if df_agg[col_p].iloc[0] > 0 else "red")
+        ("Profit", col_p, "green" if totals[col_p] > 0 else "red")
     ]
     
     # Renderizar métricas en columnas
     cols = st.columns(3)
     for col, (label, col_val, color) in zip(cols, metrics):
-        formatted_value = f"<span style='color:{color}; font-size:40px; font-weight:bold;'>$ {df_agg[col_val].iloc[0]:,.{round_value}f}</span>"
+        formatted_value = f"<span style='color:{color}; font-size:40px; font-weight:bold;'>$ {totals[col_val]:,.{round_value}f}</span>"
         col.markdown(f"""    
             <div style="text-align: center;">
                 <span style="font-size:24px; font-weight:bold;">{label} {agg_type}</span>
@@ -341,7 +340,7 @@ def render_boxplot_cat(df_full, cat_col, cat_list, col_value, variable, agg_type
     # Filtrar el dataframe para la página actual
     df_paginado = df[df[cat_col].isin(brokers_paginados)]
     
-    df_agg = df_paginado.groupby([cat_col]).agg(
+    df_agg = df_paginado.groupby([cat_col], observed=True).agg(
             median=(col_value, 'median'),
             count=(col_value, 'nunique')).reset_index().sort_values(by='median', ascending=True)
 
@@ -0,0 +1,192 @@
+import functools
+import hashlib
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.single_flight import SingleFlight
+
+# Presupuesto de memoria de las cachés en MB; se puede fijar por réplica con la variable de entorno
+CACHE_BUDGET_ENV = "EF_CACHE_BUDGET_MB"
+DEFAULT_BUDGET_MB = 2048
+
+
+def _object_bytes(values):
+    """Bytes de los objetos Python de una columna o índice object (o de sus categorías)."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.cat.categories if isinstance(values, pd.Series) else values.categories
+    return sum(map(sys.getsizeof, values.to_numpy())) if values.dtype == object else 0
+
+
+def sizeof(value):
+    """Tamaño aproximado en bytes de un valor cacheado (DataFrames, arreglos y figuras de Plotly)."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        # memory_usage(deep=True) no admite buffers object de solo lectura (las instantáneas
+        # de utils.snapshot): se miden los buffers sin deep y los objetos Python aparte
+        if isinstance(value, pd.Index):
+            return int(value.memory_usage(deep=False)) + _object_bytes(value)
+        usage = value.memory_usage(index=True, deep=False)
+        parts = [series for _, series in value.items()] if isinstance(value, pd.DataFrame) else [value]
+        return int(np.sum(usage)) + sum(_object_bytes(part) for part in parts) + _object_bytes(value.index)
+    if isinstance(value, np.ndarray):
+        return value.nbytes if value.dtype != object else sum(sizeof(item) for item in value.ravel())
+    if hasattr(value, "to_plotly_json"):
+        return sizeof(value.to_plotly_json())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    """Versión hashable de un argumento; los DataFrames y arreglos se identifican por su contenido."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest = hashlib.md5(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        if isinstance(value, pd.DataFrame):
+            digest.update(repr(list(value.columns)).encode())
+        return ("frame", value.shape, digest.hexdigest())
+    if isinstance(value, np.ndarray):
+        return ("array", value.shape, str(value.dtype), hashlib.md5(np.ascontiguousarray(value).tobytes()).hexdigest())
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(_freeze(item) for item in value)
+    return value
+
+
+class CacheManager:
+    """Caché de resultados con LRU bajo un presupuesto de memoria compartido.
+
+    Los cargadores de datos y los constructores de figuras se registran con cached(), que
+    reemplaza a st.cache_resource: los fallos concurrentes de una misma clave se calculan
+    una sola vez (SingleFlight) y cada entrada guarda su tamaño en bytes y, cuando el total
+    supera el presupuesto, se descartan las usadas hace más tiempo, de cualquier función.
+    Como en Streamlit, los argumentos cuyo nombre empieza con "_" no forman parte de la clave.
+
+    Quien sirve un resultado sin llamar a la función (RangeCache con los cortes de un
+    dataset) lo registra con touch(), que cuenta un acierto y lo marca como reciente.
+    El presupuesto solo mide lo que devuelven las funciones decoradas: quedan fuera las
+    celdas de AggregationCube, los DistanceTensor y los índices de particiones, que se
+    liberan con su dataset, y los cortes de RangeCache, que son vistas de sus buffers.
+    """
+
+    def __init__(self, budget_bytes=None):
+        if budget_bytes is None:
+            budget_bytes = int(float(os.environ.get(CACHE_BUDGET_ENV, DEFAULT_BUDGET_MB)) * 2**20)
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._stats = {}
+
+    def _counters(self, name):
+        return self._stats.setdefault(name, {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0})
+
+    def _lookup(self, key, now, count_miss=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry[2]:
+                self._entries.move_to_end(key)
+                self._counters(key[0])["hits"] += 1
+                return True, entry[0]
+            if entry is not None:
+                self._drop(key)
+            if count_miss:
+                self._counters(key[0])["misses"] += 1
+            return False, None
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _store(self, key, value, ttl):
+        size = sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.budget_bytes:
+                return
+            while self._entries and self._bytes + size > self.budget_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._counters(oldest[0])["evictions"] += 1
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self._bytes += size
+
+    def cached(self, ttl=84600, show_spinner=None):
+        """Decorador: cachea la función por sus argumentos durante ttl segundos dentro del presupuesto."""
+
+        def decorator(func):
+            name = f"{func.__module__}.{func.__qualname__}"
+            signature = inspect.signature(func)
+
+            def compute(key, args, kwargs):
+                if isinstance(show_spinner, str):
+                    with st.spinner(show_spinner):
+                        value = func(*args, **kwargs)
+                else:
+                    value = func(*args, **kwargs)
+                self._store(key, value, ttl)
+                return value
+
+            def make_key(args, kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                return (name, tuple((arg, _freeze(value)) for arg, value in bound.arguments.items() if not arg.startswith("_")))
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = make_key(args, kwargs)
+                hit, value = self._lookup(key, time.monotonic())
+                if hit:
+                    return value
+
+                led = []
+
+                def lead():
+                    led.append(True)
+                    return compute(key, args, kwargs)
+
+                try:
+                    return self._flight.do(key, lead)
+                finally:
+                    # Fallos que esperaron el cálculo de otra sesión en lugar de repetirlo
+                    if not led:
+                        with self._lock:
+                            self._counters(name)["coalesced"] += 1
+
+            wrapper.clear = lambda: self.clear(name)
+            wrapper.touch = lambda *args, **kwargs: self._lookup(make_key(args, kwargs), time.monotonic(), count_miss=False)[0]
+            return wrapper
+
+        return decorator
+
+    def clear(self, name=None):
+        """Descarta todas las entradas, o solo las de la función name."""
+        with self._lock:
+            for key in [key for key in self._entries if name is None or key[0] == name]:
+                self._drop(key)
+
+    def get_stats(self):
+        """Aciertos, fallos, fallos agrupados con otro en curso y desalojos por función, más entradas y bytes frente al presupuesto."""
+        with self._lock:
+            functions = {name: dict(counters, entries=0, bytes=0) for name, counters in self._stats.items()}
+            for (name, _), (_, size, _) in self._entries.items():
+                functions[name]["entries"] += 1
+                functions[name]["bytes"] += size
+            totals = {counter: sum(stats[counter] for stats in functions.values()) for counter in ("hits", "misses", "coalesced", "evictions")}
+            return dict(totals, entries=len(self._entries), bytes=self._bytes, budget_bytes=self.budget_bytes, functions=functions)
+
+
+cache_manager = CacheManager()
@@ -0,0 +1,70 @@
+import datetime as dt
+import itertools
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+def plan_windows(start_day, end_day, freq="W"):
+    """Divide [start_day, end_day] en ventanas alineadas al calendario.
+
+    'D' usa un día por ventana, 'W' semanas de lunes a domingo y 'M' meses calendario; la
+    primera y la última ventana se recortan al rango pedido.
+    """
+    windows = []
+    window_start = start_day
+
+    while window_start <= end_day:
+        if freq == "D":
+            window_end = window_start
+        elif freq == "W":
+            window_end = window_start + dt.timedelta(days=6 - window_start.weekday())
+        elif freq == "M":
+            next_month = (window_start.replace(day=1) + dt.timedelta(days=32)).replace(day=1)
+            window_end = next_month - dt.timedelta(days=1)
+        else:
+            raise ValueError(f"Frecuencia de ventana no soportada: {freq}")
+
+        window_end = min(window_end, end_day)
+        windows.append((window_start, window_end))
+        window_start = window_end + dt.timedelta(days=1)
+
+    return windows
+
+
+def iter_window_results(executor, func, windows, keys=None, max_in_flight=None):
+    """Lanza una descarga por ventana (y por clave) y entrega cada ventana al completarse.
+
+    Con keys se llama func(key, inicio, fin) y cada ventana entrega la lista de
+    resultados en el orden de keys; sin keys se llama func(inicio, fin). Genera
+    (ventana, resultado) en orden de llegada, con el paralelismo acotado por el executor.
+    Con max_in_flight solo esa cantidad de ventanas está en el executor a la vez: la
+    siguiente se envía cuando se completa una, así una carga larga no acapara el pool
+    que comparten todas las sesiones.
+    """
+    job_keys = [None] if keys is None else list(keys)
+    windows = list(windows)
+    queue = iter(windows)
+
+    futures = {}
+    pending = {}
+
+    def submit(window):
+        pending[window] = {}
+        for key in job_keys:
+            args = window if key is None else (key, *window)
+            futures[executor.submit(func, *args)] = (window, key)
+
+    for window in itertools.islice(queue, len(windows) if max_in_flight is None else max_in_flight):
+        submit(window)
+
+    while futures:
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            window, key = futures.pop(future)
+            pending[window][key] = future.result()
+
+            if len(pending[window]) == len(job_keys):
+                results = pending.pop(window)
+                next_window = next(queue, None)
+                if next_window is not None:
+                    submit(next_window)
+                yield window, results[None] if keys is None else [results[key] for key in job_keys]
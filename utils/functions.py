@@ -1,13 +1,18 @@
 import pandas as pd
 import numpy as np
-import requests
-import streamlit as st
 import datetime as dt
-import boto3
 import json
-import requests
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from index import token
+import utils.http_client as http_client
+from utils.fetch_planner import plan_windows, iter_window_results
+from utils.history_store import HistoryStore
+from utils.json_stream import decode_records
+from utils.range_cache import RangeCache
+from utils.cache_manager import cache_manager
+from utils.snapshot import freeze
+from utils.secrets_provider import SecretsProvider
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -22,21 +27,46 @@ def get_resolution(df_full, col):
     
     return df_full
 
+secrets_provider = SecretsProvider()
+
 def get_apikey():
 
     secret_name = "efdata/apikeys/indicators"
-    region_name = 'us-east-1'
-    client = boto3.client('secretsmanager',  region_name=region_name)
-    response = client.get_secret_value(SecretId=secret_name)
-    secret_data = json.loads(response['SecretString'])
+    secret_data = secrets_provider.get_secret(secret_name)
     key = secret_data['apikey']
     apikey=f'Apikey {key}'
     
     return apikey
 
+def parse_start_dates(values):
+    """Parse start_date timestamps as naive UTC, whether the API sends them naive, with an offset or with a trailing "Z"."""
+    
+    return pd.to_datetime(values, utc=True, format='ISO8601').dt.tz_localize(None)
+
+def add_period_codes(df):
+    """Add small-int period bucket codes (year, quarter, month, ISO week, day, weekday) from start_date."""
+    
+    dates = df['start_date']
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    iso = dates.dt.isocalendar()
+    
+    df['year'] = dates.dt.year.astype('int16')
+    df['quarter'] = dates.dt.quarter.astype('int8')
+    df['month'] = dates.dt.month.astype('int8')
+    df['iso_year'] = iso['year'].astype('int16')
+    df['iso_week'] = iso['week'].astype('int8')
+    df['day'] = dates.to_numpy(dtype='datetime64[D]').astype('int32')
+    df['weekday'] = dates.dt.weekday.astype('int8')
+    return df
+
 class DaysCalculator:
     """Calculates trip duration in days."""
     
+    # Average speed (mph) and driving hours per day, by equipment type
+    DEFAULT_PARAMS = (50, 11)
+    EQUIP_PARAMS = {'REEFER': (50, 11), 'VAN': (50, 11), 'FLATBED': (50, 11)}
+    
     @staticmethod
     def round_days(days):
         integer_part = int(days)
@@ -50,12 +80,26 @@ class DaysCalculator:
             return integer_part
 
     @staticmethod
-    def calculate_days(df):
+    def round_days_vectorized(days):
+        """Vectorized round_days: up to the next half day."""
+        days = np.asarray(days, dtype='float64')
+        integer_part = np.trunc(days)
+        decimal_part = days - integer_part
+        
+        return np.where((decimal_part > 0) & (decimal_part <= 0.5), integer_part + 0.5,
+                        np.where(decimal_part > 0.5, integer_part + 1, integer_part))
+
+    @staticmethod
+    def calculate_days(df, equip_params=None):
         """Estimate the number of days for trips."""
-        base_days = ((df['distance']) / 50) / 11
-        df['days'] = base_days
-        df['days'] = np.where(df['days'] < 1, 1, df['days'])
-        df['days'] = df['days'].apply(DaysCalculator.round_days)
+        params = DaysCalculator.EQUIP_PARAMS if equip_params is None else equip_params
+        
+        # Parameters resolved once per distinct equip, then broadcast through the codes
+        codes, equips = pd.factorize(df['equip'])
+        speed, hours = np.array([params.get(e, DaysCalculator.DEFAULT_PARAMS) for e in equips] + [DaysCalculator.DEFAULT_PARAMS], dtype='float64').T
+        
+        base_days = ((df['distance'].to_numpy(dtype='float64')) / speed[codes]) / hours[codes]
+        df['days'] = DaysCalculator.round_days_vectorized(np.where(base_days < 1, 1, base_days))
         return df
 
 class FinanceCalculator:
@@ -75,61 +119,151 @@ class FinanceCalculator:
         df = df.drop(columns=['vcost'])
         return df
 
-@st.cache_resource(ttl=84600, show_spinner="Consulting API...")
-def get_company_history(date_range):
+class CompactSchema:
+    """Compact dtypes for the loads DataFrame."""
+    
+    EQUIPS = ['REEFER', 'VAN', 'FLATBED']
+    # Only physical measures are narrowed; income/cost/profit and their ratios stay float64,
+    # float32 rounds money totals by tens of dollars and reorders the per-mile rankings
+    FLOAT32_MEASURES = ['distance', 'days']
+
+    with open("files/state_coords.json", "r") as json_file:
+        STATES = list(json.load(json_file))
+
+    @staticmethod
+    def fixed_categorical(series, vocabulary):
+        """Categorical with a fixed vocabulary; unexpected values are appended, never dropped."""
+        extra = sorted(set(series.dropna().unique()) - set(vocabulary))
+        return pd.Categorical(series, categories=vocabulary + extra)
+
+    @staticmethod
+    def apply(df):
+        """States/equip as fixed categoricals, broker/dispatcher dictionary-encoded, distance/days as float32.
+
+        Converts df in place, one column at a time, so ingestion never holds two copies of the frame.
+        """
+        
+        df['equip'] = CompactSchema.fixed_categorical(df['equip'], CompactSchema.EQUIPS)
+        for col in ['origin', 'destination']:
+            df[col] = CompactSchema.fixed_categorical(df[col], CompactSchema.STATES)
+        for col in ['broker_shipper', 'dispatcher_user']:
+            df[col] = df[col].astype('category')
+        
+        measures = [col for col in CompactSchema.FLOAT32_MEASURES if col in df.columns]
+        df[measures] = df[measures].astype('float32')
+        return df
+
+    @staticmethod
+    def bytes_per_row(df):
+        return df.memory_usage(index=True, deep=True).sum() / max(len(df), 1)
+
+HISTORY_COLUMNS = {'posted': 'start_date', 'brokerShipper': 'broker_shipper', 'dispatcherUser': 'dispatcher_user', 'equip': 'equip', 'stateOrigin': 'origin', 'stateDestination': 'destination', 'distance': 'distance', 'rateTotal': 'income'}
+
+TRUCK_TYPES = ['REF', 'DRY', 'FLT']
+# Tamaño de las ventanas en que se parten los rangos largos ('D' diario, 'W' semanal, 'M' mensual).
+# La historia va por días: cada ventana es una partición completa del almacén (un día de recogida);
+# la respuesta no trae la fecha de recogida de cada carga, así que no se puede partir una ventana más larga
+FETCH_WINDOW_FREQ = 'D'
+# Días de historia en el pool compartido por carga (un POST por tipo de camión cada uno)
+FETCH_WINDOWS_IN_FLIGHT = 2
+INDICATORS_WINDOW_FREQ = 'M'
+
+history_store = HistoryStore()
+# Los cortes servidos desde un rango cargado cuentan como uso de su entrada en cache_manager
+company_cache = RangeCache(date_col='pickup_day', on_hit=lambda date_range: load_company_history.touch(date_range))
+indicators_cache = RangeCache(on_hit=lambda date_range: load_indicators.touch(date_range))
+# Pool compartido para los POST a la API (un trabajo por tipo de camión y tramo)
+fetch_executor = ThreadPoolExecutor(max_workers=http_client.POOL_MAXSIZE, thread_name_prefix='fetch')
+
+def fetch_company_loads(equip, start_day, end_day):
+    """Download the raw loads of one truck type picked up between two days (inclusive).
+
+    Returns None on error, so incomplete days are never persisted.
+    """
     
     url = "https://fjz7bfmml2.execute-api.us-east-1.amazonaws.com/dev/company_history"
-    apikey = get_apikey()
 
-    start_date = dt.datetime.combine(date_range[0], dt.datetime.min.time())
-    end_date = dt.datetime.combine(date_range[1], dt.datetime.min.time())
+    start_date = dt.datetime.combine(start_day, dt.datetime.min.time())
+    end_date = dt.datetime.combine(end_day + dt.timedelta(days=1), dt.datetime.min.time())
     start_date = int(start_date.timestamp())
-    end_date = int(end_date.timestamp())
-
-    truck_types = ['REF', 'DRY', 'FLT']
+    # Último segundo de end_day: la medianoche siguiente ya pertenece al día de recogida siguiente
+    end_date = int(end_date.timestamp()) - 1
     
     headers = {
         'authorizationToken': token,
         'Content-Type': 'application/json'
     }
 
-    def fetch_data(equip):
-        params = {
-            "origin": {
-                "country": "USA",
-                "mode": "country"
-            },
-            "destination": {
-                "country": "USA",
-                "mode": "country"
-            },
-            "truck_types": [equip],  # Se usa la variable `equip`
-            "pickup_start": start_date,
-            "pickup_end": end_date
-        }
+    params = {
+        "origin": {
+            "country": "USA",
+            "mode": "country"
+        },
+        "destination": {
+            "country": "USA",
+            "mode": "country"
+        },
+        "truck_types": [equip],  # Se usa la variable `equip`
+        "pickup_start": start_date,
+        "pickup_end": end_date
+    }
 
-        session = requests.Session()
-        session.headers.update(headers)
-        response = session.post(url, json=params)
+    try:
+        with http_client.post(url, json=params, headers=headers, stream=True) as response:
+            if response.status_code == 200:
+                # Solo se conservan las columnas que usa el pipeline
+                return decode_records(response, 'loads', list(HISTORY_COLUMNS), numeric_columns=('distance', 'rateTotal'))
+            else:
+                print(f"Error {response.status_code} para {equip}: {response.text}")
+                return None
+    except Exception as e:
+        print(f"Error para {equip}: {e}")
+        return None
 
-        if response.status_code == 200:
-            data = json.loads(response.text)
-            return pd.DataFrame(data['loads'])
-        else:
-            print(f"Error {response.status_code} para {equip}: {response.text}")
-            return pd.DataFrame()
+def fetch_company_history(gaps):
+    """Download the missing gaps one pickup day at a time, one POST per day and truck type.
+
+    The API filters by pickup date, so each day's response is that day's complete
+    partition. Only FETCH_WINDOWS_IN_FLIGHT days are queued on the shared pool at a time,
+    so a cold load of a long range leaves room for other sessions' fetches.
+    Yields ((day, day), DataFrame or None) as each day completes.
+    """
+    
+    windows = [window for gap_start, gap_end in gaps for window in plan_windows(gap_start, gap_end, FETCH_WINDOW_FREQ)]
 
-    # Ejecutar en paralelo con ThreadPoolExecutor
-    with ThreadPoolExecutor() as executor:
-        results = list(executor.map(fetch_data, truck_types))
+    for window, frames in iter_window_results(fetch_executor, fetch_company_loads, windows, TRUCK_TYPES, max_in_flight=FETCH_WINDOWS_IN_FLIGHT):
+        if any(frame is None for frame in frames):
+            yield window, None
+            continue
 
-    df_full = pd.concat(results, ignore_index=True)
+        df = pd.concat(frames, ignore_index=True)
+        df = df.rename(columns=HISTORY_COLUMNS)
+        df['start_date'] = parse_start_dates(df['start_date'])
+        df['pickup_day'] = pd.Timestamp(window[0])
+        yield window, df
+
+@cache_manager.cached(ttl=84600, show_spinner="Consulting API...")
+def load_company_history(date_range):
+    
+    start_day, end_day = date_range[0], date_range[1]
+
+    # Solo se consulta la API para los días que no están en el almacén local
+    stored = history_store.read(start_day, end_day)
+    results = [] if stored is None else [stored]
     
-    df_full = df_full[['posted', 'brokerShipper', 'dispatcherUser', 'equip', 'stateOrigin', 'stateDestination', 'distance', 'rateTotal']]
-    df_full = df_full.rename(columns={'posted': 'start_date', 'brokerShipper': 'broker_shipper', 'dispatcherUser': 'dispatcher_user', 'equip': 'equip', 'stateOrigin': 'origin', 'stateDestination': 'destination', 'distance': 'distance', 'rateTotal': 'income'})
+    gaps = history_store.missing_ranges(start_day, end_day)
+    for (day, _), df_day in fetch_company_history(gaps):
+        if df_day is None:
+            continue
+        history_store.write(df_day, day)
+        results.append(df_day)
+
+    df_full = pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=list(HISTORY_COLUMNS.values()) + ['pickup_day'])
+    # Ordenado por día de recogida, el campo del rango pedido, para que RangeCache corte subrangos
+    df_full = df_full.sort_values(['pickup_day', 'start_date'], ignore_index=True)
 
     df_full = df_full.query("origin != destination")
-    df_full['start_date'] = pd.to_datetime(df_full['start_date'])
+    df_full['start_date'] = parse_start_dates(df_full['start_date'])
     df_full = FinanceCalculator.calculate_finance(df_full)
     df_full = DaysCalculator.calculate_days(df_full)
     
@@ -139,16 +273,20 @@ def get_company_history(date_range):
         df_full[f'{var}_day'] = df_full[var] / df_full['days']
         df_full = df_full.round({f'{var}_dist': 2, f'{var}_day': 0})
     
-    return df_full
+    df_full = add_period_codes(df_full)
+    
+    df_full = CompactSchema.apply(df_full)
+    
+    # Todas las sesiones comparten este objeto: se entrega como instantánea de solo lectura
+    return freeze(df_full)
 
-@st.cache_resource(ttl=84600, show_spinner="Consulting API...")
-def get_indicators(date_range):
+def fetch_indicators(apikey, start_day, end_day):
+    """Download the industry indicators of the six lanes between two days (inclusive)."""
     
     url = 'https://qisxbxcvh8.execute-api.us-east-1.amazonaws.com/dev/get-indicators'
-    apikey = get_apikey()
     
-    start_date = date_range[0].strftime("%Y-%m-%d")
-    end_date = date_range[1].strftime("%Y-%m-%d")
+    start_date = start_day.strftime("%Y-%m-%d")
+    end_date = end_day.strftime("%Y-%m-%d")
     
     params = {
     "lanes": [
@@ -222,9 +360,7 @@ def get_indicators(date_range):
         'Content-Type': 'application/json'
     }
 
-    session = requests.Session()
-    session.headers.update(headers)
-    response = session.post(url, json=params)
+    response = http_client.post(url, json=params, headers=headers)
 
     data = json.loads(response.text)
     df = pd.DataFrame(data)
@@ -233,5 +369,40 @@ def get_indicators(date_range):
     df = get_resolution(df, 'origin').rename(columns={'resolution':'res_origin'})
     df = get_resolution(df, 'destination').rename(columns={'resolution':'res_destination'})
     
+    df['start_date'] = parse_start_dates(df['start_date'])
+    
+    return df
+
+@cache_manager.cached(ttl=84600, show_spinner="Consulting API...")
+def load_indicators(date_range):
+    
+    apikey = get_apikey()
+    
+    # Rangos largos se piden por ventanas mensuales y se acumulan a medida que llegan
+    windows = plan_windows(date_range[0], date_range[1], INDICATORS_WINDOW_FREQ)
+    results = [df_window for _, df_window in iter_window_results(fetch_executor, partial(fetch_indicators, apikey), windows)]
+    
+    df = pd.concat(results, ignore_index=True)
+    df = add_period_codes(df)
+    df = df.sort_values('start_date', ignore_index=True)
+    
+    return freeze(df)
+
+def get_company_history(date_range):
+    """Company loads for date_range, sliced from any cached range that covers it."""
+    
+    df = company_cache.get(date_range)
+    if df is None:
+        df = load_company_history(date_range)
+        company_cache.put(date_range, df)
+    return df
+
+def get_indicators(date_range):
+    """Industry indicators for date_range, sliced from any cached range that covers it."""
+    
+    df = indicators_cache.get(date_range)
+    if df is None:
+        df = load_indicators(date_range)
+        indicators_cache.put(date_range, df)
     return df
 
@@ -1,10 +1,11 @@
 import plotly.express as px
 import plotly.graph_objects as go
-import streamlit as st
 import pandas as pd
 import json
 import numpy as np
 import utils.constants as c
+from utils.cache_manager import cache_manager
+from utils.snapshot import overlay
 
 
 class MapConfig:
@@ -35,6 +36,49 @@ class MapConfig:
     )
 
 
+class StateCoords:
+    """Centroides (lon, lat) de los estados, cargados una sola vez en un arreglo."""
+
+    with open("files/state_coords.json", "r") as json_file:
+        _coords = json.load(json_file)
+    INDEX = pd.Index(list(_coords))
+    LONLAT = np.array(list(_coords.values()), dtype=float)
+
+    @staticmethod
+    def lookup(states):
+        """(lon, lat, found): coordenadas de los estados con centroide y máscara de cuáles lo tienen."""
+        pos = StateCoords.INDEX.get_indexer(np.asarray(states, dtype=object))
+        found = pos >= 0
+        lonlat = StateCoords.LONLAT[pos[found]]
+        return lonlat[:, 0], lonlat[:, 1], found
+
+
+def add_frame_layers(fig, df, anm_col, build_layers):
+    """Añade capas que siguen la animación: build_layers(df_cuadro) devuelve las trazas de cada cuadro.
+
+    Cada cuadro recibe las mismas capas calculadas sobre sus filas, y las del primer cuadro
+    van también en fig.data, que es lo que se muestra antes de animar. Sin animación, las
+    capas se calculan sobre todo df.
+
+    Con colores discretos plotly express crea en cada cuadro solo las trazas de las
+    categorías presentes; los cuadros se completan con trazas ocultas para que las capas
+    ocupen siempre las mismas posiciones y no queden trazas de un cuadro anterior.
+    """
+    if not fig.frames:
+        fig.add_traces(build_layers(df))
+        return fig
+
+    groups = {str(value): rows for value, rows in df.groupby(anm_col, sort=False)}
+    empty = df.iloc[:0]
+    n_base = max(len(frame.data) for frame in fig.frames)
+    for frame in fig.frames:
+        base = [trace.update(visible=True) for trace in frame.data]
+        base += [type(fig.frames[0].data[0])(visible=False) for _ in range(n_base - len(base))]
+        frame.data = tuple(base) + tuple(build_layers(groups.get(frame.name, empty)))
+    fig.add_traces(fig.frames[0].data[len(fig.data):])
+    return fig
+
+
 class ChoroplethMap:
     """Clase base para la generación de mapas coropléticos."""
 
@@ -91,10 +135,14 @@ class ChoroplethMap:
         return fig
 
 
-@st.cache_resource(ttl=84600, show_spinner="Creating map for states...")
-def get_map_states(df, variable, state_id, anm_col, namevar, round_value, tooltip, state=None, color_scale="ylgn"):
-    """Función de alto nivel para obtener el mapa de estados estándar."""
-    df[anm_col] = df[anm_col].astype(str)
+@cache_manager.cached(ttl=84600, show_spinner="Creating map for states...")
+def get_map_states(_df, key, variable, state_id, anm_col, namevar, round_value, tooltip, state=None, color_scale="ylgn"):
+    """Función de alto nivel para obtener el mapa de estados estándar.
+
+    key identifica el contenido de _df (versión del dataset y filtros de la página), así
+    que el DataFrame no se hashea para buscar el mapa en la caché.
+    """
+    df = overlay(_df, **{anm_col: _df[anm_col].astype(str)})
     
     min_val = df[variable].min()
     max_val = df[variable].max()
@@ -126,10 +174,10 @@ def get_map_states(df, variable, state_id, anm_col, namevar, round_value, toolti
     return fig
 
 
-@st.cache_resource(ttl=84600, show_spinner="Creating map for states...")
-def get_map_states_h(df, variable, state_id, anm_col, namevar, round_value, tooltip, var_plot):
-    """Genera un mapa coroplético con diferencias o ratios."""
-    df[anm_col] = df[anm_col].astype(str)
+@cache_manager.cached(ttl=84600, show_spinner="Creating map for states...")
+def get_map_states_h(_df, key, variable, state_id, anm_col, namevar, round_value, tooltip, var_plot):
+    """Genera un mapa coroplético con diferencias o ratios; key identifica el contenido de _df."""
+    df = overlay(_df, **{anm_col: _df[anm_col].astype(str)})
     
     color_scale="rdylgn"
     value = max(abs(df[variable].min()), abs(df[variable].max()))
@@ -138,39 +186,26 @@ def get_map_states_h(df, variable, state_id, anm_col, namevar, round_value, tool
     choropleth = ChoroplethMap(df, state_id, variable, namevar, round_value, min_val, max_val, color_scale)
     fig = choropleth.generate_map(anm_col, tooltip)
 
-    with open("files/state_coords.json", "r") as json_file:
-        state_coords = json.load(json_file)
-    
     if "profit" in var_plot.lower() and 'diff' in variable:
-        for _, row in df.iterrows():
-            state = row[state_id]
-            if state in state_coords:
-                fig.add_trace(go.Scattergeo(
-                    lon=[state_coords[state][0]],
-                    lat=[state_coords[state][1]],
-                    marker=dict(size=40, symbol="square", opacity=1, color='white'),
-                    mode="markers",
-                    showlegend=False
-                ))
-                fig.add_trace(go.Scattergeo(
-                    lon=[state_coords[state][0]],
-                    lat=[state_coords[state][1]],
-                    text=f"{row[var_plot]:.{round_value}f}",
-                    mode="text",
-                    textfont=dict(
-                        color="blue" if row[var_plot] > 0 else "red",
-                        size=15,
-                    ),
-                    showlegend=False
-                ))
+        def value_layers(rows):
+            lon, lat, found = StateCoords.lookup(rows[state_id])
+            values = rows[var_plot].to_numpy()[found]
+            return [
+                go.Scattergeo(lon=lon, lat=lat, marker=dict(size=40, symbol="square", opacity=1, color='white'),
+                              mode="markers", showlegend=False),
+                go.Scattergeo(lon=lon, lat=lat, text=[f"{value:.{round_value}f}" for value in values], mode="text",
+                              textfont=dict(color=np.where(values > 0, "blue", "red"), size=15), showlegend=False),
+            ]
+
+        add_frame_layers(fig, df, anm_col, value_layers)
                 
     return fig
 
 
-@st.cache_resource(ttl=84600, show_spinner="Creating map for states...")
+@cache_manager.cached(ttl=84600, show_spinner="Creating map for states...")
 def get_map_states_rh(df, variable, state_id, anm_col, namevar, round_value):
     """Genera un mapa coroplético para relaciones In/Out."""
-    df[anm_col] = df[anm_col].astype(str)
+    df = overlay(df, **{anm_col: df[anm_col].astype(str)})
     org_var = variable.split("_io")[0]
     round_variable = round_value if org_var == "profit" else 2
     
@@ -178,10 +213,10 @@ def get_map_states_rh(df, variable, state_id, anm_col, namevar, round_value):
     return choropleth.generate_map(anm_col)
 
 
-@st.cache_resource(ttl=84600, show_spinner="Creating map for states...")
+@cache_manager.cached(ttl=84600, show_spinner="Creating map for states...")
 def get_map_states_brk(df, variable, state_id, anm_col, namevar, suffix, round_value):
     """Genera un mapa de estados con datos segmentados."""
-    df[anm_col] = df[anm_col].astype(str)
+    df = overlay(df, **{anm_col: df[anm_col].astype(str)})
     min_val, max_val = (0, 2) if variable == "Ratio" else (df[variable].min(), df[variable].max())
     round_variable = 2 if namevar == "Ratio" else round_value
     
@@ -189,7 +224,7 @@ def get_map_states_brk(df, variable, state_id, anm_col, namevar, suffix, round_v
     return choropleth.generate_map(anm_col)
 
 
-@st.cache_resource(ttl=84600, show_spinner="Creating map for states...")
+@cache_manager.cached(ttl=84600, show_spinner="Creating map for states...")
 def get_map_color_dis(df_pivot, state_id, color_col, color_dict, round_value):
     """Genera un mapa coroplético con colores discretos."""
     fig = px.choropleth(
@@ -207,7 +242,7 @@ def get_map_color_dis(df_pivot, state_id, color_col, color_dict, round_value):
     fig.update_traces(hoverlabel=MapConfig.HOVERLABEL_CONFIG)
     return fig
 
-@st.cache_resource(ttl=84600, show_spinner="Creating violin plot...")
+@cache_manager.cached(ttl=84600, show_spinner="Creating violin plot...")
 def get_violinplot(df, x_var, y_var, title, y_title, x_title, cl='category', color_dict=None, keep_tick=True):
     df = df.dropna(subset=[x_var])
     fig = px.violin(df, x=y_var, y=x_var, title=title, color=cl, box=True, color_discrete_map=color_dict)
@@ -227,10 +262,10 @@ def get_violinplot(df, x_var, y_var, title, y_title, x_title, cl='category', col
         )
     return fig
 
-@st.cache_resource(ttl=84600, show_spinner="Creating map for states...")
-def get_map_dis_bubble(df_pivot_m, state_id, color_dict, color_col, color_bubble):
+@cache_manager.cached(ttl=84600, show_spinner="Creating map for states...")
+def get_map_dis_bubble(_df_pivot_m, key, state_id, color_dict, color_col, color_bubble):
     fig = px.choropleth(
-        df_pivot_m,
+        _df_pivot_m,
         locations=state_id,
         locationmode="USA-states",
         color=color_col,
@@ -240,20 +275,20 @@ def get_map_dis_bubble(df_pivot_m, state_id, color_dict, color_col, color_bubble
         color_discrete_map=color_dict,
         labels={'best_equip_r': '<b>Best Equip</b>', 'origin': 'State', 'destination': 'State', 'start_date': 'Start Date', 'REEFER_r': 'REEFER', 'VAN_r': 'VAN', 'FLATBED_r': 'FLATBED'},
     )
-    with open("files/state_coords.json", "r") as json_file:
-        state_coords = json.load(json_file)
-    for i, row in df_pivot_m.iterrows():
-        state = row[state_id]
-        if state in state_coords:
-            fig.add_trace(go.Scattergeo(lon=[state_coords[state][0]], lat=[state_coords[state][1]], marker=dict(size=20, symbol="circle", opacity=1, color=row[color_bubble]), mode="markers", showlegend=False))
+    # Burbuja de cada estado coloreada con equip_color_r, una sola traza por cuadro de la animación
+    def bubble_layer(rows):
+        lon, lat, found = StateCoords.lookup(rows[state_id])
+        return [go.Scattergeo(lon=lon, lat=lat, marker=dict(size=20, symbol="circle", opacity=1, color=rows[color_bubble].to_numpy()[found]), mode="markers", showlegend=False)]
+
+    add_frame_layers(fig, _df_pivot_m, 'start_date', bubble_layer)
     fig.update_layout(width=MapConfig.WIDTH, height=MapConfig.HEIGHT, margin=MapConfig.MARGIN, legend=dict(title_font=dict(size=38), font=dict(size=30)))
     fig.update_traces(hoverlabel=MapConfig.HOVERLABEL_CONFIG)
     return fig
 
-@st.cache_resource(ttl=84600, show_spinner="Creating map for states...")
-def get_map_color_dis(df_pivot, state_id, color_col, color_dict, round_value):
+@cache_manager.cached(ttl=84600, show_spinner="Creating map for states...")
+def get_map_color_dis(_df_pivot, key, state_id, color_col, color_dict, round_value):
     fig = px.choropleth(
-        df_pivot,
+        _df_pivot,
         locations=state_id,
         locationmode="USA-states",
         color=color_col,
@@ -267,7 +302,7 @@ def get_map_color_dis(df_pivot, state_id, color_col, color_dict, round_value):
     fig.update_traces(hoverlabel=MapConfig.HOVERLABEL_CONFIG)
     return fig
 
-@st.cache_resource(ttl=84600, show_spinner="Creating box plot...")
+@cache_manager.cached(ttl=84600, show_spinner="Creating box plot...")
 def get_boxplot(df, x_var, y_var, title, y_title, x_title, cl=None, keep_tick=True):
     """Genera un boxplot con opciones de personalización."""
     fig = px.box(df, x=y_var, y=x_var, title=title, color=cl)
@@ -314,7 +349,7 @@ def get_boxplot(df, x_var, y_var, title, y_title, x_title, cl=None, keep_tick=Tr
     return fig
 
 
-@st.cache_resource(ttl=84600, show_spinner="Creating distance heat map...")
+@cache_manager.cached(ttl=84600, show_spinner="Creating distance heat map...")
 def get_map_color_hdistance(df_pivot, state_id, color_col, color_dict, state=None):
     """Genera un mapa coroplético con colores discretos basado en la distancia."""
     fig = px.choropleth(
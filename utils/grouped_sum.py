@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+# Tamaño máximo del espacio de claves para reducir sobre un arreglo denso;
+# por encima se compactan antes las claves observadas con np.unique
+DENSE_LIMIT = 5_000_000
+
+
+def _factorize(cols):
+    """Códigos comunes de una clave en varios frames: (códigos por frame, tamaño, decodificador).
+
+    Las categóricas usan las categorías del primer frame; los nulos y los valores fuera
+    de ellas quedan en -1.
+    """
+    first = cols[0]
+    if isinstance(first.dtype, pd.CategoricalDtype):
+        codes = [col.cat.codes.to_numpy() if col.dtype == first.dtype else pd.Categorical(col, dtype=first.dtype).codes for col in cols]
+        return codes, len(first.cat.categories), lambda cell_codes: pd.Categorical.from_codes(cell_codes, dtype=first.dtype)
+
+    values = [col.to_numpy() for col in cols]
+    if all(v.dtype.kind in 'iu' for v in values) and any(len(v) for v in values):
+        # Claves enteras (códigos de periodo): el desplazamiento al mínimo ya es un código ordenado
+        low = min(int(v.min()) for v in values if len(v))
+        high = max(int(v.max()) for v in values if len(v))
+        dtype = values[0].dtype
+        return [v.astype('intp') - low for v in values], high - low + 1, lambda cell_codes: (cell_codes + low).astype(dtype)
+
+    codes, uniques = pd.factorize(pd.concat(cols, ignore_index=True), sort=True)
+    return np.split(codes, np.cumsum([len(col) for col in cols])[:-1]), len(uniques), uniques.take
+
+
+class _Reduction:
+    """Conteos y sumas por celda de varios frames sobre un mismo espacio de claves."""
+
+    def __init__(self, frames, keys, measures, dense=False):
+        self.keys = keys
+        factorized = [_factorize([frame[key] for frame in frames]) for key in keys]
+        self.decoders = [decode for _, _, decode in factorized]
+        self.shape = tuple(size for _, size, _ in factorized)
+        size = int(np.prod(self.shape, dtype='int64'))
+
+        flats, valids = [], []
+        for i in range(len(frames)):
+            codes = [key_codes[i] for key_codes, _, _ in factorized]
+            valid = np.logical_and.reduce([code >= 0 for code in codes])
+            if valid.all():
+                valid = None
+            else:
+                codes = [code[valid] for code in codes]
+            flats.append(np.ravel_multi_index(codes, self.shape))
+            valids.append(valid)
+
+        if dense or size <= DENSE_LIMIT:
+            self.cells, indexes, n_cells = None, flats, size
+        else:
+            self.cells, inverse = np.unique(np.concatenate(flats), return_inverse=True)
+            indexes, n_cells = np.split(inverse, np.cumsum([len(flat) for flat in flats])[:-1]), len(self.cells)
+
+        self.counts = np.array([np.bincount(index, minlength=n_cells) for index in indexes])
+        self.sums = {}
+        for measure in measures:
+            self.sums[measure] = []
+            for frame, index, valid in zip(frames, indexes, valids):
+                values = frame[measure].to_numpy(dtype='float64')
+                if valid is not None:
+                    values = values[valid]
+                if np.isnan(values).any():
+                    values = np.nan_to_num(values)
+                self.sums[measure].append(np.bincount(index, weights=values, minlength=n_cells))
+
+    def build(self, keep, columns):
+        """DataFrame con las claves de las celdas keep y columns {nombre: (sumas, dtype)}."""
+        idx = np.flatnonzero(keep)
+        cell_ids = idx if self.cells is None else self.cells[idx]
+        result = {key: decode(cell_codes) for key, decode, cell_codes in zip(self.keys, self.decoders, np.unravel_index(cell_ids, self.shape))}
+        for name, (sums, dtype) in columns.items():
+            result[name] = sums[idx].astype(dtype)
+        return pd.DataFrame(result)
+
+
+def grouped_sum(df, keys, measures):
+    """Suma measures por keys con NumPy, equivalente a groupby(keys, observed=True)[measures].sum().
+
+    Cada clave se convierte a códigos enteros, la clave compuesta se mapea a un índice
+    denso con np.ravel_multi_index y cada medida se reduce con np.bincount. Las filas
+    con alguna clave nula se descartan y los NaN de las medidas suman 0, como en pandas.
+    """
+    reduction = _Reduction([df], keys, measures)
+    columns = {measure: (reduction.sums[measure][0], df[measure].dtype) for measure in measures}
+    return reduction.build(reduction.counts[0] > 0, columns)
+
+
+def grouped_sum_wide(frames, keys, measures):
+    """Suma measures por keys en varias fuentes y las alinea en un solo DataFrame ancho.
+
+    frames es un dict {sufijo: DataFrame} y cada medida sale como f"{medida}_{sufijo}".
+    Las fuentes comparten el espacio de claves, así que quedan alineadas sin merge; solo
+    se conservan las celdas presentes en todas, como en un merge interno.
+    """
+    reduction = _Reduction(list(frames.values()), keys, measures)
+    columns = {}
+    for i, (suffix, frame) in enumerate(frames.items()):
+        for measure in measures:
+            columns[f"{measure}_{suffix}"] = (reduction.sums[measure][i], frame[measure].dtype)
+    return reduction.build((reduction.counts > 0).all(axis=0), columns)
+
+
+def grouped_sum_tensor(df, keys, measures):
+    """Sumas de measures en un tensor denso con un eje por clave y uno final por medida.
+
+    Devuelve (tensor, conteos, ejes): conteos tiene la forma de las claves y ejes el valor
+    de cada posición de cada eje (las categorías completas en las claves categóricas).
+    """
+    reduction = _Reduction([df], keys, measures, dense=True)
+    tensor = np.stack([reduction.sums[measure][0] for measure in measures], axis=-1).reshape(reduction.shape + (len(measures),))
+    counts = reduction.counts[0].reshape(reduction.shape)
+    axes = [decode(np.arange(size)) for decode, size in zip(reduction.decoders, reduction.shape)]
+    return tensor, counts, axes
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import datetime as dt
+import pandas as pd
+
+
+class HistoryStore:
+    """Almacén local en Parquet de las cargas, con una partición por día de recogida.
+
+    La API filtra por pickup_start/pickup_end, así que cada partición guarda exactamente lo
+    que devuelve la consulta de ese día de recogida; al leer se añade la columna pickup_day.
+    """
+
+    def __init__(self, root="files/history/pickup"):
+        self.root = root
+
+    def _path(self, day):
+        return os.path.join(self.root, f"{day:%Y-%m-%d}.parquet")
+
+    @staticmethod
+    def _days(start, end):
+        return [start + dt.timedelta(days=i) for i in range((end - start).days + 1)]
+
+    @staticmethod
+    def is_closed(day):
+        """Un día solo se persiste cuando ya terminó; el día en curso siempre se consulta."""
+        return day < dt.date.today()
+
+    def has_day(self, day):
+        return self.is_closed(day) and os.path.exists(self._path(day))
+
+    def missing_ranges(self, start, end):
+        """Devuelve los tramos contiguos de días sin partición como [(inicio, fin), ...]."""
+        ranges = []
+        for day in self._days(start, end):
+            if self.has_day(day):
+                continue
+            if ranges and ranges[-1][1] == day - dt.timedelta(days=1):
+                ranges[-1] = (ranges[-1][0], day)
+            else:
+                ranges.append((day, day))
+        return ranges
+
+    def read(self, start, end):
+        """Lee las particiones disponibles entre start y end (inclusive), con su pickup_day."""
+        frames = []
+        for day in self._days(start, end):
+            if self.has_day(day):
+                frame = pd.read_parquet(self._path(day))
+                if len(frame) > 0:
+                    frames.append(frame.assign(pickup_day=pd.Timestamp(day)))
+        return pd.concat(frames, ignore_index=True) if frames else None
+
+    def write(self, df, day):
+        """Guarda df como la partición completa del día de recogida day (si ya terminó), aunque esté vacío."""
+        if not self.is_closed(day):
+            return
+        os.makedirs(self.root, exist_ok=True)
+        # Temporal propio por escritor: dos sesiones pueden descargar y guardar el mismo día a la vez
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=f"{day:%Y-%m-%d}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            df.drop(columns="pickup_day", errors="ignore").to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self._path(day))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
@@ -0,0 +1,57 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Conexiones keep-alive por host y número de hosts distintos en el pool
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 8
+
+# (conexión, lectura) en segundos
+TIMEOUT = (5, 60)
+
+# Reintentos acotados con backoff exponencial y jitter; los endpoints POST de la API
+# son consultas de solo lectura, por lo que es seguro reintentarlos
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+BACKOFF_JITTER = 0.5
+STATUS_FORCELIST = (429, 500, 502, 503, 504)
+
+_session = None
+_lock = threading.Lock()
+
+
+def build_session(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, retries=RETRIES):
+    """Crea una sesión con pool de conexiones por host y reintentos con backoff."""
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_jitter=BACKOFF_JITTER,
+        status_forcelist=STATUS_FORCELIST,
+        allowed_methods=frozenset(["GET", "POST"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry, pool_block=True)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """Sesión compartida por todo el proceso, creada la primera vez que se usa."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def post(url, json=None, headers=None, timeout=TIMEOUT, **kwargs):
+    """POST usando la sesión compartida, con timeout por defecto."""
+    return get_session().post(url, json=json, headers=headers, timeout=timeout, **kwargs)
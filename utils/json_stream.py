@@ -0,0 +1,35 @@
+from array import array
+import numpy as np
+import pandas as pd
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def decode_records(response, path, columns, numeric_columns=()):
+    """Decodifica el arreglo JSON en `path` directo a buffers por columna.
+
+    Con ijson el cuerpo se lee en streaming desde el socket y cada registro se
+    descarta apenas se copian las columnas pedidas; las columnas numéricas se
+    guardan en buffers float64 compactos. Sin ijson se decodifica el cuerpo completo.
+    """
+    buffers = {col: array("d") if col in numeric_columns else [] for col in columns}
+
+    if ijson is not None:
+        response.raw.decode_content = True
+        records = ijson.items(response.raw, f"{path}.item", use_float=True)
+    else:
+        records = response.json()[path]
+
+    for record in records:
+        for col, buffer in buffers.items():
+            value = record.get(col)
+            if col in numeric_columns:
+                buffer.append(float("nan") if value is None else value)
+            else:
+                buffer.append(value)
+
+    data = {col: np.frombuffer(buffer, dtype="float64") if col in numeric_columns else np.array(buffer, dtype=object) for col, buffer in buffers.items()}
+    return pd.DataFrame(data, columns=list(columns))
@@ -0,0 +1,36 @@
+import threading
+import weakref
+import numpy as np
+
+
+class PartitionIndex:
+    """Índice de particiones de un DataFrame: posiciones de fila por valor de columna.
+
+    Cada columna (o combinación de columnas) se particiona una sola vez, la primera vez
+    que se filtra por ella, y los filtros por igualdad se resuelven con las posiciones ya
+    calculadas, sin recorrer el DataFrame ni parsear expresiones. Guarda una referencia débil al DataFrame para no
+    mantenerlo vivo desde las cachés que lo registran.
+    """
+
+    def __init__(self, df):
+        self._df = weakref.ref(df)
+        self._partitions = {}
+        self._lock = threading.Lock()
+
+    def _partition(self, cols):
+        with self._lock:
+            if cols not in self._partitions:
+                self._partitions[cols] = self._df().groupby(list(cols), observed=True, sort=False).indices
+            return self._partitions[cols]
+
+    def positions(self, **criteria):
+        """Posiciones (ordenadas) de las filas que cumplen col == valor para todos los criterios."""
+        if not criteria:
+            return np.arange(len(self._df()))
+        cols = tuple(sorted(criteria))
+        key = criteria[cols[0]] if len(cols) == 1 else tuple(criteria[col] for col in cols)
+        return self._partition(cols).get(key, np.array([], dtype="intp"))
+
+    def select(self, **criteria):
+        """Filas que cumplen los criterios, en el orden y con el índice del DataFrame original."""
+        return self._df().take(self.positions(**criteria))
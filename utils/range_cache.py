@@ -0,0 +1,89 @@
+import threading
+import weakref
+from collections import OrderedDict
+import time
+import datetime as dt
+import pandas as pd
+
+from utils.snapshot import Snapshot, freeze
+
+
+class RangeCache:
+    """Caché en memoria de datasets por rango de fechas.
+
+    Si un rango ya cargado cubre el rango pedido, devuelve un corte (sin copia) del
+    DataFrame ya normalizado usando búsqueda binaria sobre la columna de fechas ordenada.
+    Los datasets se guardan con referencias débiles: su memoria la controla la caché que
+    los cargó, y cuando esta los descarta se descartan también sus cortes. Como esa
+    caché no ve las consultas que se sirven aquí, on_hit(rango) recibe el rango cargado
+    que respondió cada una para que su entrada conste como usada.
+    """
+
+    def __init__(self, date_col="start_date", ttl=84600, max_entries=8, on_hit=None):
+        self.date_col = date_col
+        self.on_hit = on_hit
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = []
+        self._slices = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bound(self, series, day):
+        ts = pd.Timestamp(day)
+        tz = getattr(series.dt, "tz", None)
+        return ts.tz_localize(tz) if tz is not None else ts
+
+    def _slice(self, df, start, end):
+        dates = df[self.date_col]
+        lo = dates.searchsorted(self._bound(dates, start), side="left")
+        hi = dates.searchsorted(self._bound(dates, end + dt.timedelta(days=1)), side="left")
+        df_slice = df.iloc[lo:hi]
+        # El corte también lo comparten todas las sesiones: sigue siendo una instantánea
+        return freeze(df_slice) if isinstance(df, Snapshot) else df_slice
+
+    def get(self, date_range):
+        """Devuelve el dataset para date_range si algún rango cacheado lo cubre, si no None."""
+        df, source = self._find(date_range)
+        if df is not None and self.on_hit is not None:
+            self.on_hit(source)
+        return df
+
+    def _find(self, date_range):
+        """(dataset o corte para date_range, rango cargado del que sale) o (None, None)."""
+        start, end = date_range[0], date_range[1]
+        now = time.monotonic()
+
+        with self._lock:
+            self._entries = [entry for entry in self._entries if now - entry[3] < self.ttl and entry[2]() is not None]
+            for key in [key for key, (_, _, ref, _) in self._slices.items() if ref() is None]:
+                del self._slices[key]
+
+            for entry_start, entry_end, ref, _ in self._entries:
+                df = ref()
+                if df is not None and entry_start == start and entry_end == end:
+                    return df, (entry_start, entry_end)
+
+            slice_entry = self._slices.get((start, end))
+            if slice_entry is not None and now - slice_entry[1] < self.ttl:
+                self._slices.move_to_end((start, end))
+                return slice_entry[0], slice_entry[3]
+
+            for entry_start, entry_end, ref, created in self._entries:
+                df = ref()
+                if df is not None and entry_start <= start and entry_end >= end:
+                    # El corte se guarda para devolver el mismo objeto en las siguientes consultas
+                    df_slice = self._slice(df, start, end)
+                    self._slices[(start, end)] = (df_slice, created, ref, (entry_start, entry_end))
+                    while len(self._slices) > self.max_entries:
+                        self._slices.popitem(last=False)
+                    return df_slice, (entry_start, entry_end)
+        return None, None
+
+    def put(self, date_range, df):
+        """Guarda un dataset ordenado por date_col y descarta los rangos que quedan cubiertos."""
+        start, end = date_range[0], date_range[1]
+
+        with self._lock:
+            self._entries = [entry for entry in self._entries if not (start <= entry[0] and entry[1] <= end)]
+            self._entries.append((start, end, weakref.ref(df), time.monotonic()))
+            self._entries = self._entries[-self.max_entries:]
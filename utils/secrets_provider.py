@@ -0,0 +1,71 @@
+import os
+import re
+import json
+import time
+import threading
+
+REGION_NAME = "us-east-1"
+SECRETS_TTL = 3600
+
+# Sustitutos sin red para pruebas y benchmarks:
+#   EF_SECRETS_FILE=ruta.json con {"<secret_id>": {...}}
+#   EF_SECRET_<SECRET_ID>='{...}' (secret_id en mayúsculas, separadores como "_")
+SECRETS_FILE_ENV = "EF_SECRETS_FILE"
+SECRET_ENV_PREFIX = "EF_SECRET_"
+
+
+class SecretsProvider:
+    """Obtiene secretos de AWS Secrets Manager con caché en memoria por TTL.
+
+    El cliente de boto3 se crea (y boto3 se importa) solo la primera vez que hace
+    falta ir a AWS.
+    """
+
+    def __init__(self, region_name=REGION_NAME, ttl=SECRETS_TTL):
+        self.region_name = region_name
+        self.ttl = ttl
+        self._client = None
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client("secretsmanager", region_name=self.region_name)
+        return self._client
+
+    @staticmethod
+    def _env_name(secret_id):
+        return SECRET_ENV_PREFIX + re.sub(r"[^A-Z0-9]", "_", secret_id.upper())
+
+    def _load(self, secret_id):
+        env_value = os.environ.get(self._env_name(secret_id))
+        if env_value:
+            return json.loads(env_value)
+
+        secrets_file = os.environ.get(SECRETS_FILE_ENV)
+        if secrets_file:
+            with open(secrets_file, "r") as json_file:
+                return json.load(json_file)[secret_id]
+
+        response = self._get_client().get_secret_value(SecretId=secret_id)
+        return json.loads(response["SecretString"])
+
+    def get_secret(self, secret_id):
+        """Devuelve el secreto como dict, consultando la fuente solo si expiró el TTL."""
+        with self._lock:
+            value, expires_at = self._cache.get(secret_id, (None, 0))
+            if time.monotonic() < expires_at:
+                return value
+
+            value = self._load(secret_id)
+            self._cache[secret_id] = (value, time.monotonic() + self.ttl)
+            return value
+
+    def invalidate(self, secret_id=None):
+        """Descarta un secreto (o todos) para forzar una nueva lectura, p. ej. tras rotarlo."""
+        with self._lock:
+            if secret_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(secret_id, None)
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+
+def _locked(array):
+    """Vista no escribible de array, sin copiarlo."""
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def _read_only(series):
+    """La misma columna sobre una vista no escribible de su buffer, sin copiarlo."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Los códigos son el único buffer mutable; las categorías ya son un Index inmutable
+        values = pd.Categorical.from_codes(_locked(series.cat.codes.to_numpy()), dtype=series.dtype)
+    elif isinstance(series.dtype, np.dtype):
+        values = _locked(series.to_numpy())
+    else:
+        raise TypeError(f"freeze: la columna {series.name!r} ({series.dtype}) no tiene un buffer NumPy que se pueda bloquear")
+    return pd.Series(values, index=series.index, name=series.name, copy=False)
+
+
+class Snapshot(pd.DataFrame):
+    """DataFrame de solo lectura que comparten todas las sesiones.
+
+    Sus columnas son vistas no escribibles de los buffers cargados: escribir valores
+    falla con ValueError, y añadir, reemplazar o borrar columnas (o cualquier operación
+    inplace) falla con TypeError. Las columnas de cada petición van en overlay(). Lo que
+    se deriva de él (filtros, agregados, copias) es un DataFrame normal y escribible.
+    """
+
+    _metadata = []
+
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    def _reject(self, *args, **kwargs):
+        raise TypeError("Snapshot es de solo lectura: las columnas nuevas o reemplazadas van en overlay()")
+
+    __setitem__ = __delitem__ = insert = _reject
+    # Todos los métodos con inplace=True terminan en _update_inplace
+    _update_inplace = _reject
+
+    def __setattr__(self, name, value):
+        # pandas convierte df.col = valor en df["col"] = valor y, si falla, lo guarda como atributo
+        if not name.startswith("_") and name in self.columns:
+            self._reject()
+        super().__setattr__(name, value)
+
+    def _consolidate_inplace(self):
+        # Consolidar reemplazaría los buffers de solo lectura por bloques nuevos escribibles
+        pass
+
+    columns = property(pd.DataFrame.columns.__get__, _reject)
+    index = property(pd.DataFrame.index.__get__, _reject)
+
+
+def freeze(df):
+    """Instantánea inmutable de df sin copiar sus columnas.
+
+    Admite columnas NumPy y categóricas; cualquier otro arreglo de extensión (nullable,
+    arrow, fechas con zona horaria) lanza TypeError en lugar de quedar escribible.
+    """
+    columns = {col: _read_only(series) for col, series in df.items()}
+    snapshot = Snapshot(columns, index=df.index, columns=df.columns, copy=False)
+    snapshot.attrs = dict(df.attrs)
+    return snapshot
+
+
+def is_frozen(df):
+    """True si df es una instantánea y ninguna de sus columnas se puede escribir en su lugar."""
+    return isinstance(df, Snapshot) and all(not series.to_numpy().flags.writeable
+                                            for _, series in df.items() if isinstance(series.dtype, np.dtype))
+
+
+def overlay(df, **columns):
+    """DataFrame por petición con las columnas de df sin copiar más columns añadidas o reemplazadas.
+
+    Las columnas base siguen siendo las de la instantánea (de solo lectura); solo las de
+    columns ocupan memoria nueva, así que cada sesión deriva lo suyo sin tocar el dataset.
+    """
+    data = {col: columns.get(col, df[col]) for col in df.columns}
+    data.update((col, values) for col, values in columns.items() if col not in data)
+    data = {col: values if isinstance(values, pd.Series) else pd.Series(values, index=df.index) for col, values in data.items()}
+    return pd.DataFrame(data, index=df.index, copy=False)